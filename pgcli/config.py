@@ -1,3 +1,4 @@
+import json
 import shutil
 import os
 import platform
@@ -17,6 +18,16 @@ def config_location():
         return expanduser("~/.config/pgcli/")
 
 
+def cache_location():
+    if "XDG_CACHE_HOME" in os.environ:
+        return "%s/pgcli/" % expanduser(os.environ["XDG_CACHE_HOME"])
+    elif platform.system() == "Windows":
+        user_profile = os.getenv("USERPROFILE", "")
+        return user_profile + "\\AppData\\Local\\dbcli\\pgcli\\cache\\"
+    else:
+        return expanduser("~/.cache/pgcli/")
+
+
 def load_config(usr_cfg, def_cfg=None):
     # avoid config merges when possible. For writing, we need an umerged config instance.
     # see https://github.com/dbcli/pgcli/issues/1240 and https://github.com/DiffSK/configobj/issues/171
@@ -30,6 +41,40 @@ def load_config(usr_cfg, def_cfg=None):
     return cfg
 
 
+# Parsed config files: {(path, options): ((st_mtime_ns, st_size), ConfigObj)}.
+# The cached objects are only ever merged from as plain dicts, never handed out.
+_PARSED_CONFIG_CACHE = {}
+
+
+def _parse_config_file(path, **options):
+    """Parse a config file, reusing the last parse while its mtime and size are unchanged."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ConfigObj(path, **options)
+    key = (path, tuple(sorted(options.items())))
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _PARSED_CONFIG_CACHE.get(key)
+    if cached is None or cached[0] != stamp:
+        cached = _PARSED_CONFIG_CACHE[key] = (stamp, ConfigObj(path, **options))
+    return cached[1]
+
+
+def load_cached_config(usr_cfg, def_cfg):
+    """Like load_config with a default config, but without re-parsing unchanged files.
+
+    ConfigObj.merge() stores Section objects as-is, so plain dict copies of
+    the cached parses are merged instead. Comments are not carried over,
+    which makes the result unsuitable for writing back; use load_config for that.
+    """
+    # The merged sections are created by cfg itself, so it must not interpolate either
+    cfg = ConfigObj(interpolation=False)
+    cfg.merge(_parse_config_file(def_cfg, interpolation=False).dict())
+    cfg.merge(_parse_config_file(expanduser(usr_cfg), interpolation=False, encoding="utf-8").dict())
+    cfg.filename = expanduser(usr_cfg)
+    return cfg
+
+
 def ensure_dir_exists(path):
     parent_dir = expanduser(dirname(path))
     os.makedirs(parent_dir, exist_ok=True)
@@ -64,7 +109,82 @@ def get_config(pgclirc_file=None):
     default_config = os.path.join(package_root, "pgclirc")
     write_default_config(default_config, pgclirc_file)
 
-    return load_config(pgclirc_file, default_config)
+    return load_cached_config(pgclirc_file, default_config)
+
+
+# Set this environment variable to bypass the on-disk config snapshot.
+CONFIG_CACHE_DISABLE_ENV = "PGCLI_NO_CONFIG_CACHE"
+
+# The only sections kept in the snapshot: the ones pgcli_dumpall reads.
+CACHED_CONFIG_SECTIONS = ("ssh tunnels", "dsn ssh tunnels")
+
+
+class ConfigSnapshot(dict):
+    """Read-only stand-in for a ConfigObj, restored from the config cache.
+
+    Only exposes what read-only callers need: dict access and ``filename``.
+    """
+
+    def __init__(self, data, filename=None):
+        super().__init__(data)
+        self.filename = filename
+
+
+def get_cached_config(pgclirc_file=None, loader=None):
+    """Load the pgcli config, reusing an on-disk snapshot when it is unchanged.
+
+    The snapshot is keyed by the (path, mtime, size) of the user and default
+    config files and stored as JSON under cache_location(), readable only by
+    the user since tunnel URLs may hold passwords. It keeps just the
+    CACHED_CONFIG_SECTIONS. On a hit, the ConfigObj parse is skipped entirely
+    and a ConfigSnapshot of those sections is returned, so this is only
+    suitable for callers that read nothing else and never write the config back.
+
+    :param pgclirc_file: optional path to the user config file
+    :param loader: function used to load the config on a cache miss
+                   (defaults to get_config)
+    """
+    loader = loader or get_config
+    if os.environ.get(CONFIG_CACHE_DISABLE_ENV):
+        return loader(pgclirc_file)
+
+    from pgcli import __file__ as package_root
+
+    filename = expanduser(get_config_filename(pgclirc_file))
+    default_config = os.path.join(os.path.dirname(package_root), "pgclirc")
+    try:
+        fingerprint = []
+        for path in (filename, default_config):
+            st = os.stat(path)
+            fingerprint.append([path, st.st_mtime_ns, st.st_size])
+    except OSError:
+        # Missing user config: let the loader create it, don't cache yet.
+        return loader(pgclirc_file)
+
+    cache_file = cache_location() + "config.cache"
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint and cached.get("sections") == list(CACHED_CONFIG_SECTIONS):
+            return ConfigSnapshot(cached["config"], filename)
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass
+
+    config = loader(pgclirc_file)
+    try:
+        data = {name: dict(config[name]) for name in CACHED_CONFIG_SECTIONS if name in config}
+        ensure_dir_exists(cache_file)
+        tmp_file = "%s.%d" % (cache_file, os.getpid())
+        if exists(tmp_file):
+            # A leftover keeps its old mode, which O_CREAT wouldn't reset
+            os.remove(tmp_file)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "sections": list(CACHED_CONFIG_SECTIONS), "config": data}, f)
+        os.replace(tmp_file, cache_file)
+    except (OSError, TypeError, ValueError):
+        pass
+    return config
 
 
 def get_casing_file(config):
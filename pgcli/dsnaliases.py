@@ -108,19 +108,16 @@ class DsnAliases:
 
         logger.debug(f"Loading DSN aliases from include directory: {include_dir}")
 
-        # Get all .conf files in the directory, sorted for consistent ordering
+        # Get all .conf files in the directory, sorted for consistent ordering.
+        # scandir's DirEntry answers is_file() without a separate stat call.
         try:
-            files = sorted(
-                f
-                for f in os.listdir(include_dir)
-                if f.endswith(".conf") and os.path.isfile(os.path.join(include_dir, f))
-            )
+            with os.scandir(include_dir) as entries:
+                filepaths = sorted(entry.path for entry in entries if entry.name.endswith(".conf") and entry.is_file())
         except OSError as e:
             logger.warning(f"Error reading DSN aliases include directory: {e}")
             return
 
-        for filename in files:
-            filepath = os.path.join(include_dir, filename)
+        for filepath in filepaths:
             self._load_aliases_from_file(filepath)
 
     def _load_aliases_from_file(self, filepath):
@@ -5,16 +5,22 @@ This tool provides the same functionality as pg_dumpall but adds support for
 SSH tunnels using pgcli's configuration.
 """
 
+from __future__ import annotations
+
+import functools
 import logging
 import os
+import re
+import stat
 import subprocess
 import sys
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import click
 
-from .config import get_config
-from .ssh_tunnel import get_tunnel_manager_from_config, SSH_TUNNEL_SUPPORT
+from .config import get_cached_config, get_config
+from .ssh_tunnel import get_tunnel_manager_from_config
 from .dump import get_password_from_pgpass, parse_user_and_database
 
 
@@ -35,113 +41,285 @@ def setup_logging(verbose: bool = False) -> logging.Logger:
     return logger
 
 
+def _is_executable_file(path: str) -> bool:
+    """Check that path is a regular file with an execute bit, using one stat()."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISREG(st.st_mode) and bool(st.st_mode & 0o111)
+
+
+# Common install locations, checked after PATH
+_COMMON_PG_DUMPALL_PATHS = (
+    "/usr/bin/pg_dumpall",
+    "/usr/local/bin/pg_dumpall",
+    "/usr/pgsql-17/bin/pg_dumpall",
+    "/usr/pgsql-16/bin/pg_dumpall",
+    "/usr/pgsql-15/bin/pg_dumpall",
+    "/usr/pgsql-14/bin/pg_dumpall",
+)
+
+
+@functools.lru_cache(maxsize=1)
 def find_pg_dumpall() -> str:
-    """Find pg_dumpall executable in PATH."""
-    # Check common locations
-    paths_to_check = [
-        "/usr/bin/pg_dumpall",
-        "/usr/local/bin/pg_dumpall",
-        "/usr/pgsql-17/bin/pg_dumpall",
-        "/usr/pgsql-16/bin/pg_dumpall",
-        "/usr/pgsql-15/bin/pg_dumpall",
-        "/usr/pgsql-14/bin/pg_dumpall",
-    ]
+    """Find pg_dumpall executable in PATH.
 
+    The result is cached for the lifetime of the process; call
+    ``find_pg_dumpall.cache_clear()`` if PATH changes.
+    """
     # First check PATH
-    for path in os.environ.get("PATH", "").split(os.pathsep):
+    path_env = os.environ.get("PATH", "")
+    path_entries = path_env.split(os.pathsep) if path_env else ()
+    for path in path_entries:
         pg_dumpall_path = os.path.join(path, "pg_dumpall")
-        if os.path.isfile(pg_dumpall_path) and os.access(pg_dumpall_path, os.X_OK):
+        if _is_executable_file(pg_dumpall_path):
             return pg_dumpall_path
 
     # Then check common locations
-    for path in paths_to_check:
-        if os.path.isfile(path) and os.access(path, os.X_OK):
+    for path in _COMMON_PG_DUMPALL_PATHS:
+        if _is_executable_file(path):
             return path
 
     return "pg_dumpall"  # Fall back to PATH lookup
 
 
-def parse_connection_args(args: List[str]) -> tuple:
+# Each handler takes (args, i, state) and returns the index of the next
+# argument to look at, or None to fall back to copying the argument as-is.
+ArgHandler = Callable[[List[str], int, "_ConnectionArgsState"], Optional[int]]
+
+# A renderer turns a recorded connection option back into arguments,
+# given (value, tunnel_host, tunnel_port).
+ArgRenderer = Callable[[Any, str, int], List[str]]
+
+
+def _parse_kv_dbname(dbname: str) -> Optional[List[Tuple[str, Optional[str]]]]:
     """
-    Parse connection-related arguments from the command line.
+    Split a keyword/value connection string passed as dbname.
 
     Returns:
-        Tuple of (host, port, remaining_args, has_host, has_port)
+        Ordered list of (keyword, value) pairs (value is None for tokens
+        without '='), or None if dbname does not name a host and should be
+        passed through untouched.
     """
-    host = os.environ.get("PGHOST", "localhost")
-    port = int(os.environ.get("PGPORT", 5432))
-    remaining_args = []
-    has_host = False
-    has_port = False
+    if "host=" not in dbname:
+        return None
+    pairs: List[Tuple[str, Optional[str]]] = []
+    for part in dbname.split():
+        key, sep, value = part.partition("=")
+        pairs.append((key, value) if sep else (part, None))
+    return pairs
+
+
+def _render_kv_dbname(pairs: List[Tuple[str, Optional[str]]], tunnel_host: str, tunnel_port: int) -> str:
+    """Join connection string pairs back, pointing host/port at the tunnel."""
+    new_parts = []
+    for key, value in pairs:
+        if value is None:
+            new_parts.append(key)
+            continue
+        if key == "host":
+            value = tunnel_host
+        elif key == "port":
+            value = str(tunnel_port)
+        new_parts.append(f"{key}={value}")
+    return " ".join(new_parts)
+
+
+def _rewrite_dbname_connection(dbname: Any, tunnel_host: str, tunnel_port: int) -> str:
+    """Replace host/port in a recorded dbname (raw string or parsed pairs)."""
+    if isinstance(dbname, str):
+        return dbname
+    return _render_kv_dbname(dbname, tunnel_host, tunnel_port)
+
+
+def _render_host_flag(value: Any, tunnel_host: str, tunnel_port: int) -> List[str]:
+    return ["-h", tunnel_host]
+
+
+def _render_port_flag(value: Any, tunnel_host: str, tunnel_port: int) -> List[str]:
+    return ["-p", str(tunnel_port)]
+
+
+def _render_dbname_flag(value: Any, tunnel_host: str, tunnel_port: int) -> List[str]:
+    return ["-d", _rewrite_dbname_connection(value, tunnel_host, tunnel_port)]
+
+
+def _render_host_eq(value: Any, tunnel_host: str, tunnel_port: int) -> List[str]:
+    return [f"--host={tunnel_host}"]
+
+
+def _render_port_eq(value: Any, tunnel_host: str, tunnel_port: int) -> List[str]:
+    return [f"--port={tunnel_port}"]
+
+
+def _render_dbname_eq(value: Any, tunnel_host: str, tunnel_port: int) -> List[str]:
+    return [f"--dbname={_rewrite_dbname_connection(value, tunnel_host, tunnel_port)}"]
+
+
+@dataclass
+class _ConnectionArgsState:
+    """Connection settings collected while scanning pg_dumpall arguments.
+
+    Besides the parsed host/port, the scan records where each connection
+    option appeared so that the argument list can later be rewritten for
+    a tunnel endpoint without walking the arguments again.
+    """
+
+    host: str
+    port: int
+    has_host: bool = False
+    has_port: bool = False
+    remaining_args: List[str] = field(default_factory=list)
+    segments: List[Tuple[Optional[ArgRenderer], Any]] = field(default_factory=list)
+
+    def extract_dbname_connection(self, dbname: str) -> Any:
+        """
+        Pick host/port out of a connection string passed as dbname.
+
+        Returns:
+            The parsed (keyword, value) pairs to reuse when rewriting, or
+            the raw dbname when it carries no connection settings.
+        """
+        pairs = _parse_kv_dbname(dbname)
+        if pairs is None:
+            return dbname
+        for key, value in pairs:
+            if value is None:
+                continue
+            if key == "host":
+                self.host = value
+                self.has_host = True
+            elif key == "port":
+                self.port = int(value)
+                self.has_port = True
+        return pairs
+
+    def rewrite(self, tunnel_host: str, tunnel_port: int) -> List[str]:
+        """Render the scanned arguments pointed at tunnel_host:tunnel_port."""
+        new_args = []
+        for render, value in self.segments:
+            if render is None:
+                new_args.append(value)
+            else:
+                new_args.extend(render(value, tunnel_host, tunnel_port))
+
+        # Add host/port if they weren't in original args
+        if not self.has_host:
+            new_args.extend(["-h", tunnel_host])
+        if not self.has_port:
+            new_args.extend(["-p", str(tunnel_port)])
+
+        return new_args
+
+
+def _handle_host_flag(args: List[str], i: int, state: _ConnectionArgsState) -> Optional[int]:
+    if i + 1 >= len(args):
+        # A dangling -h still gets replaced by the tunnel endpoint
+        state.segments.append((_render_host_flag, ""))
+        return i + 1
+    state.host = args[i + 1]
+    state.has_host = True
+    state.segments.append((_render_host_flag, args[i + 1]))
+    return i + 2
+
+
+def _handle_port_flag(args: List[str], i: int, state: _ConnectionArgsState) -> Optional[int]:
+    if i + 1 >= len(args):
+        state.segments.append((_render_port_flag, ""))
+        return i + 1
+    state.port = int(args[i + 1])
+    state.has_port = True
+    state.segments.append((_render_port_flag, args[i + 1]))
+    return i + 2
+
+
+def _handle_dbname_flag(args: List[str], i: int, state: _ConnectionArgsState) -> Optional[int]:
+    if i + 1 >= len(args):
+        return None
+    state.segments.append((_render_dbname_flag, state.extract_dbname_connection(args[i + 1])))
+    return i + 2
+
+
+def _handle_host_eq(value: str, state: _ConnectionArgsState) -> None:
+    state.host = value
+    state.has_host = True
+    state.segments.append((_render_host_eq, value))
+
+
+def _handle_port_eq(value: str, state: _ConnectionArgsState) -> None:
+    state.port = int(value)
+    state.has_port = True
+    state.segments.append((_render_port_eq, value))
+
+
+def _handle_dbname_eq(value: str, state: _ConnectionArgsState) -> None:
+    state.segments.append((_render_dbname_eq, state.extract_dbname_connection(value)))
+
+
+_FLAG_HANDLERS: Dict[str, ArgHandler] = {
+    "-h": _handle_host_flag,
+    "--host": _handle_host_flag,
+    "-p": _handle_port_flag,
+    "--port": _handle_port_flag,
+    "-d": _handle_dbname_flag,
+    "--dbname": _handle_dbname_flag,
+}
+
+# --option=value forms: one match yields both the option name and its value
+_LONG_OPT_RE = re.compile(r"--(host|port|dbname)=(.*)", re.DOTALL)
+
+_EQ_HANDLERS: Dict[str, Callable[[str, _ConnectionArgsState], None]] = {
+    "host": _handle_host_eq,
+    "port": _handle_port_eq,
+    "dbname": _handle_dbname_eq,
+}
+
+
+def _scan_connection_args(args: List[str]) -> _ConnectionArgsState:
+    """
+    Walk args once, recording connection settings and where they appeared.
+
+    The returned state holds the parsed host/port and can produce the
+    tunneled argument list via its rewrite() method.
+    """
+    state = _ConnectionArgsState(
+        host=os.environ.get("PGHOST", "localhost"),
+        port=int(os.environ.get("PGPORT", 5432)),
+    )
 
     i = 0
     while i < len(args):
         arg = args[i]
+        next_i = None
 
-        # Handle -h/--host
-        if arg in ("-h", "--host"):
-            if i + 1 < len(args):
-                host = args[i + 1]
-                has_host = True
-                remaining_args.extend([arg, args[i + 1]])
-                i += 2
-                continue
-        elif arg.startswith("--host="):
-            host = arg.split("=", 1)[1]
-            has_host = True
-            remaining_args.append(arg)
-            i += 1
-            continue
+        handler = _FLAG_HANDLERS.get(arg)
+        if handler is not None:
+            next_i = handler(args, i, state)
+        else:
+            match = _LONG_OPT_RE.match(arg)
+            if match:
+                _EQ_HANDLERS[match.group(1)](match.group(2), state)
+                next_i = i + 1
 
-        # Handle -p/--port
-        if arg in ("-p", "--port"):
-            if i + 1 < len(args):
-                port = int(args[i + 1])
-                has_port = True
-                remaining_args.extend([arg, args[i + 1]])
-                i += 2
-                continue
-        elif arg.startswith("--port="):
-            port = int(arg.split("=", 1)[1])
-            has_port = True
-            remaining_args.append(arg)
-            i += 1
-            continue
+        if next_i is None:
+            state.segments.append((None, arg))
+            next_i = i + 1
+        state.remaining_args.extend(args[i:next_i])
+        i = next_i
+
+    return state
 
-        # Handle -d/--dbname with connection string
-        if arg in ("-d", "--dbname"):
-            if i + 1 < len(args):
-                dbname = args[i + 1]
-                if "host=" in dbname:
-                    # Extract host from connection string
-                    for part in dbname.split():
-                        if part.startswith("host="):
-                            host = part.split("=", 1)[1]
-                            has_host = True
-                        elif part.startswith("port="):
-                            port = int(part.split("=", 1)[1])
-                            has_port = True
-                remaining_args.extend([arg, dbname])
-                i += 2
-                continue
-        elif arg.startswith("--dbname="):
-            dbname = arg.split("=", 1)[1]
-            if "host=" in dbname:
-                for part in dbname.split():
-                    if part.startswith("host="):
-                        host = part.split("=", 1)[1]
-                        has_host = True
-                    elif part.startswith("port="):
-                        port = int(part.split("=", 1)[1])
-                        has_port = True
-            remaining_args.append(arg)
-            i += 1
-            continue
 
-        remaining_args.append(arg)
-        i += 1
+def parse_connection_args(args: List[str]) -> tuple:
+    """
+    Parse connection-related arguments from the command line.
 
-    return host, port, remaining_args, has_host, has_port
+    Returns:
+        Tuple of (host, port, remaining_args, has_host, has_port)
+    """
+    state = _scan_connection_args(args)
+    return state.host, state.port, state.remaining_args, state.has_host, state.has_port
 
 
 def build_tunneled_args(
@@ -156,80 +334,53 @@ def build_tunneled_args(
     """
     Build new argument list with tunneled connection parameters.
     """
-    new_args = []
-    i = 0
+    state = _scan_connection_args(original_args)
+    state.has_host = has_host
+    state.has_port = has_port
+    return state.rewrite(tunnel_host, tunnel_port)
 
-    while i < len(original_args):
-        arg = original_args[i]
 
-        # Replace host arguments
-        if arg in ("-h", "--host"):
-            new_args.extend(["-h", tunnel_host])
-            i += 2  # Skip the original value
-            continue
-        elif arg.startswith("--host="):
-            new_args.append(f"--host={tunnel_host}")
-            i += 1
-            continue
+# Pipe capacity requested for stdout when pg_dumpall writes into a pipe
+STDOUT_PIPE_SIZE = 1 << 20
 
-        # Replace port arguments
-        if arg in ("-p", "--port"):
-            new_args.extend(["-p", str(tunnel_port)])
-            i += 2
-            continue
-        elif arg.startswith("--port="):
-            new_args.append(f"--port={tunnel_port}")
-            i += 1
-            continue
 
-        # Handle connection strings in dbname
-        if arg in ("-d", "--dbname"):
-            if i + 1 < len(original_args):
-                dbname = original_args[i + 1]
-                if "host=" in dbname:
-                    # Replace host and port in connection string
-                    parts = dbname.split()
-                    new_parts = []
-                    for part in parts:
-                        if part.startswith("host="):
-                            new_parts.append(f"host={tunnel_host}")
-                        elif part.startswith("port="):
-                            new_parts.append(f"port={tunnel_port}")
-                        else:
-                            new_parts.append(part)
-                    new_args.extend(["-d", " ".join(new_parts)])
-                else:
-                    new_args.extend(["-d", dbname])
-                i += 2
-                continue
-        elif arg.startswith("--dbname="):
-            dbname = arg.split("=", 1)[1]
-            if "host=" in dbname:
-                parts = dbname.split()
-                new_parts = []
-                for part in parts:
-                    if part.startswith("host="):
-                        new_parts.append(f"host={tunnel_host}")
-                    elif part.startswith("port="):
-                        new_parts.append(f"port={tunnel_port}")
-                    else:
-                        new_parts.append(part)
-                new_args.append(f"--dbname={' '.join(new_parts)}")
-            else:
-                new_args.append(arg)
-            i += 1
-            continue
+def _grow_stdout_pipe(logger: logging.Logger) -> None:
+    """
+    Enlarge the stdout pipe buffer on Linux.
 
-        new_args.append(arg)
-        i += 1
+    When the dump is piped into a compressor (``pgcli_dumpall | zstd``), a
+    bigger pipe lets pg_dumpall write in fewer, larger chunks. Terminals and
+    regular files are left alone, and failures (e.g. a lower
+    /proc/sys/fs/pipe-max-size) are ignored.
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        import fcntl
 
-    # Add host/port if they weren't in original args
-    if not has_host:
-        new_args.extend(["-h", tunnel_host])
-    if not has_port:
-        new_args.extend(["-p", str(tunnel_port)])
+        fd = sys.stdout.fileno()
+        if not stat.S_ISFIFO(os.fstat(fd).st_mode):
+            return
+        fcntl.fcntl(fd, getattr(fcntl, "F_SETPIPE_SZ", 1031), STDOUT_PIPE_SIZE)
+    except (OSError, ValueError) as e:
+        logger.debug("Could not resize stdout pipe: %s", e)
 
-    return new_args
+
+def _exec_pg_dumpall(cmd: List[str], logger: logging.Logger) -> None:
+    """
+    Replace the current process with pg_dumpall.
+
+    Used when no SSH tunnel has to be kept alive, so no wrapper process sits
+    around for the duration of the dump and signals go straight to
+    pg_dumpall. Only returns if the exec fails, in which case the caller
+    falls back to running it as a subprocess.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execvp(cmd[0], cmd)
+    except OSError as e:
+        logger.debug("Could not exec %s (%s), running it as a subprocess", cmd[0], e)
 
 
 @click.command(
@@ -282,15 +433,16 @@ def cli(ctx, ssh_tunnel: Optional[str], dsn_alias: Optional[str], verbose: bool)
     # Get all extra arguments (pg_dumpall options)
     pg_dumpall_args = ctx.args
 
-    # Load pgcli config
+    # Load pgcli config (read-only here, so a cached snapshot is fine)
     try:
-        config = get_config()
+        config = get_cached_config(loader=get_config)
     except Exception as e:
         logger.warning("Could not load pgcli config: %s", e)
         config = {}
 
-    # Parse connection arguments
-    host, port, remaining_args, has_host, has_port = parse_connection_args(pg_dumpall_args)
+    # Parse connection arguments (one pass; the rewrite for a tunnel reuses it)
+    connection_args = _scan_connection_args(pg_dumpall_args)
+    host, port = connection_args.host, connection_args.port
     logger.debug("Parsed connection: host=%s, port=%d", host, port)
 
     # Setup SSH tunnel manager
@@ -314,18 +466,11 @@ def cli(ctx, ssh_tunnel: Optional[str], dsn_alias: Optional[str], verbose: bool)
     # Prepare environment (may need to set PGPASSWORD for tunneled connections)
     env = os.environ.copy()
 
-    if tunnel_host != host or tunnel_port != port:
+    tunneled = tunnel_host != host or tunnel_port != port
+    if tunneled:
         # Tunnel is active, modify connection args
         logger.debug("SSH tunnel active: %s:%d -> %s:%d", host, port, tunnel_host, tunnel_port)
-        final_args = build_tunneled_args(
-            remaining_args,
-            tunnel_host,
-            tunnel_port,
-            host,
-            port,
-            has_host,
-            has_port,
-        )
+        final_args = connection_args.rewrite(tunnel_host, tunnel_port)
 
         # Look up password from .pgpass using ORIGINAL host (not tunneled)
         # This is needed because pg_dumpall will see 127.0.0.1 but .pgpass has the real host
@@ -345,6 +490,10 @@ def cli(ctx, ssh_tunnel: Optional[str], dsn_alias: Optional[str], verbose: bool)
     cmd = [pg_dumpall_path] + final_args
     logger.debug("Executing: %s", " ".join(cmd))
 
+    _grow_stdout_pipe(logger)
+    if not tunneled and os.name == "posix":
+        _exec_pg_dumpall(cmd, logger)
+
     try:
         result = subprocess.run(cmd, env=env)
         sys.exit(result.returncode)
@@ -13,6 +13,7 @@ import traceback
 import logging
 import threading
 import shutil
+import stat
 import functools
 import datetime as dt
 import itertools
@@ -60,6 +61,7 @@ from .pgcompleter import PGCompleter
 from .pgtoolbar import create_toolbar_tokens_func
 from .pgstyle import style_factory, style_factory_output
 from .pgexecute import PGExecute
+from .ssh_tunnel import SSH_TUNNEL_SUPPORT, SSHTunnelManager, parse_tunnel_url
 from .completion_refresher import CompletionRefresher
 from .config import (
     get_casing_file,
@@ -78,8 +80,6 @@ from .__init__ import __version__
 
 click.disable_unicode_literals_warning = True
 
-from urllib.parse import urlparse
-
 from getpass import getuser
 
 from psycopg import OperationalError, InterfaceError, Notify
@@ -88,17 +88,18 @@ from psycopg.errors import Diagnostic
 
 from collections import namedtuple
 
+# re2 (google-re2) matches in linear time, which helps on long colored output lines
 try:
-    import sshtunnel
-
-    SSH_TUNNEL_SUPPORT = True
+    import re2 as color_code_re
 except ImportError:
-    SSH_TUNNEL_SUPPORT = False
-
+    color_code_re = re
 
 # Ref: https://stackoverflow.com/questions/30425105/filter-special-chars-such-as-color-codes-from-shell-output
-COLOR_CODE_REGEX = re.compile(r"\x1b(\[.*?[@-~]|\].*?(\x07|\x1b\\))")
+COLOR_CODE_REGEX = color_code_re.compile(r"\x1b(\[.*?[@-~]|\].*?(\x07|\x1b\\))")
 DEFAULT_MAX_FIELD_WIDTH = 500
+# Locations that \i, \o and \log-file must never read from or write to.
+RESTRICTED_PATH_PREFIXES = ("/dev/", "/proc/", "/sys/")
+RESTRICTED_PATHS = frozenset(prefix.rstrip("/") for prefix in RESTRICTED_PATH_PREFIXES)
 
 # Query tuples are used for maintaining history
 class MetaQuery(NamedTuple):
@@ -572,10 +573,13 @@ class PGCli:
         Returns (resolved_path, error_message). error_message is None if OK.
         """
         resolved = os.path.realpath(os.path.expanduser(path_str))
-        blocked = ("/dev/", "/proc/", "/sys/")
-        if any(resolved.startswith(p) or resolved == p.rstrip("/") for p in blocked):
+        if resolved.startswith(RESTRICTED_PATH_PREFIXES) or resolved in RESTRICTED_PATHS:
             return None, f"Access denied: path resolves to restricted location ({resolved})"
-        if os.path.exists(resolved) and not os.path.isfile(resolved):
+        try:
+            st = os.stat(resolved)
+        except OSError:
+            return resolved, None
+        if not stat.S_ISREG(st.st_mode):
             return None, f"Not a regular file: {resolved}"
         return resolved, None
 
@@ -754,13 +758,14 @@ class PGCli:
         )
 
     def connect_uri(self, uri):
-        kwargs = conninfo_to_dict(uri)
+        parsed_uri = conninfo_to_dict(uri)
         remap = {"dbname": "database", "password": "passwd"}
-        kwargs = {remap.get(k, k): v for k, v in kwargs.items()}
-        # Pass the original URI as dsn parameter for .pgpass support with SSH tunnels
-        self.connect(dsn=uri, **kwargs)
+        kwargs = {remap.get(k, k): v for k, v in parsed_uri.items()}
+        # Pass the original URI as dsn parameter for .pgpass support with SSH tunnels,
+        # along with its parse so connect() doesn't split it again
+        self.connect(dsn=uri, parsed_dsn=parsed_uri, **kwargs)
 
-    def connect(self, database="", host="", user="", port="", passwd="", dsn="", **kwargs):
+    def connect(self, database="", host="", user="", port="", passwd="", dsn="", parsed_dsn=None, **kwargs):
         # Connect to the database.
 
         if not user:
@@ -802,23 +807,23 @@ class PGCli:
             return False
 
         if dsn:
-            parsed_dsn = conninfo_to_dict(dsn)
+            if parsed_dsn is None:
+                parsed_dsn = conninfo_to_dict(dsn)
             if "host" in parsed_dsn:
                 host = parsed_dsn["host"]
             if "port" in parsed_dsn:
                 port = parsed_dsn["port"]
 
-        if self.dsn_alias and self.dsn_ssh_tunnel_config and not self.ssh_tunnel_url:
-            for dsn_regex, tunnel_url in self.dsn_ssh_tunnel_config.items():
-                if re.fullmatch(dsn_regex, self.dsn_alias):
-                    self.ssh_tunnel_url = tunnel_url
-                    break
-
-        if self.ssh_tunnel_config and not self.ssh_tunnel_url:
-            for db_host_regex, tunnel_url in self.ssh_tunnel_config.items():
-                if re.fullmatch(db_host_regex, host):
-                    self.ssh_tunnel_url = tunnel_url
-                    break
+        if not self.ssh_tunnel_url:
+            # Built per connect so reassigned tunnel config attributes are picked up.
+            # Like pgcli_dump/pgcli_dumpall, an empty host (libpq's default) is not
+            # matched against [ssh tunnels], so a catch-all ".*" doesn't tunnel it.
+            tunnel_manager = SSHTunnelManager(
+                ssh_tunnel_config=self.ssh_tunnel_config,
+                dsn_ssh_tunnel_config=self.dsn_ssh_tunnel_config,
+                logger=self.logger,
+            )
+            self.ssh_tunnel_url = tunnel_manager.find_tunnel_url(host=host, dsn_alias=self.dsn_alias)
 
         if self.ssh_tunnel_url:
             # Verify sshtunnel is available
@@ -831,17 +836,14 @@ class PGCli:
                 )
                 sys.exit(1)
 
-            # We add the protocol as urlparse doesn't find it by itself
-            if "://" not in self.ssh_tunnel_url:
-                self.ssh_tunnel_url = f"ssh://{self.ssh_tunnel_url}"
-
-            tunnel_info = urlparse(self.ssh_tunnel_url)
+            tunnel_info = parse_tunnel_url(self.ssh_tunnel_url)
 
             # Read allow_agent from config (default True to use SSH agent)
             ssh_tunnels_config = self.config.get("ssh tunnels", {})
             allow_agent = ssh_tunnels_config.get("allow_agent", "True").lower() == "true"
 
             import paramiko
+            import sshtunnel
 
             ssh_hostname = tunnel_info.hostname
             ssh_port = tunnel_info.port or 22
@@ -921,7 +923,8 @@ class PGCli:
             self.logger.debug("SSH tunnel ready, local port: %d, hostaddr: %s", port, hostaddr)
 
             if dsn:
-                dsn = make_conninfo(dsn, host=host, hostaddr=hostaddr, port=port)
+                # Reuse the parse from above rather than having make_conninfo split the DSN again
+                dsn = make_conninfo(**{**parsed_dsn, "host": host, "hostaddr": hostaddr, "port": port})
             else:
                 # For non-DSN connections, pass hostaddr via kwargs
                 kwargs["hostaddr"] = hostaddr
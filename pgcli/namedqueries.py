@@ -7,11 +7,16 @@ named queries from files in a `namedqueries.d` directory.
 
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from configobj import ConfigObj
 from pgspecial.namedqueries import NamedQueries
 
 logger = logging.getLogger(__name__)
 
+# Parsed include files, keyed by path: (st_mtime_ns, st_size, queries). Lets a
+# reload re-parse only the .conf files that changed since they were last read.
+_INCLUDE_CACHE = {}
+
 
 class ExtendedNamedQueries(NamedQueries):
     """Extended NamedQueries with support for loading from a directory.
@@ -36,6 +41,9 @@ class ExtendedNamedQueries(NamedQueries):
 
     INCLUDE_DIR_NAME = "namedqueries.d"
 
+    # Upper bound on threads used to parse include files concurrently
+    MAX_LOAD_WORKERS = 8
+
     def __init__(self, config, include_dir=None):
         """Initialize ExtendedNamedQueries.
 
@@ -46,8 +54,13 @@ class ExtendedNamedQueries(NamedQueries):
         """
         super().__init__(config)
         self._include_dir = include_dir
+        self._include_dir_resolved = self._get_include_dir()
         self._included_queries = {}
+        self._main_queries_view = {}
+        self._merged_cache = None
+        self._sorted_keys_cache = None
         self._load_included_queries()
+        self._build_cache()
 
     @classmethod
     def from_config(cls, config, include_dir=None):
@@ -76,13 +89,11 @@ class ExtendedNamedQueries(NamedQueries):
         if self._include_dir:
             return self._include_dir
 
-        config_dir = None
-        if hasattr(self.config, "filename") and self.config.filename:
-            config_dir = os.path.dirname(self.config.filename)
+        filename = getattr(self.config, "filename", None)
+        config_dir = os.path.dirname(filename) if filename else None
 
         # Check for includedir directive in named queries section
-        named_queries = self.config.get(self.section_name, {})
-        includedir = named_queries.get("includedir")
+        includedir = self.config.get(self.section_name, {}).get("includedir")
         if includedir:
             # Resolve relative paths from config directory
             if config_dir and not os.path.isabs(includedir):
@@ -97,7 +108,7 @@ class ExtendedNamedQueries(NamedQueries):
 
     def _load_included_queries(self):
         """Load named queries from all files in the include directory."""
-        include_dir = self._get_include_dir()
+        include_dir = self._include_dir_resolved
 
         if not include_dir:
             logger.debug("No include directory configured for named queries")
@@ -109,30 +120,63 @@ class ExtendedNamedQueries(NamedQueries):
 
         logger.debug(f"Loading named queries from include directory: {include_dir}")
 
-        # Get all .conf files in the directory, sorted for consistent ordering
+        # Get all .conf files in the directory, sorted for consistent ordering.
+        # DirEntry caches its stat result, so this costs one stat per file.
         try:
-            files = sorted(
-                f
-                for f in os.listdir(include_dir)
-                if f.endswith(".conf") and os.path.isfile(os.path.join(include_dir, f))
-            )
+            with os.scandir(include_dir) as entries:
+                conf_entries = sorted(
+                    (entry for entry in entries if entry.name.endswith(".conf") and entry.is_file()),
+                    key=lambda entry: entry.path,
+                )
+            stamps = {entry.path: (entry.stat().st_mtime_ns, entry.stat().st_size) for entry in conf_entries}
         except OSError as e:
             logger.warning(f"Error reading named queries include directory: {e}")
             return
 
-        for filename in files:
-            filepath = os.path.join(include_dir, filename)
-            self._load_queries_from_file(filepath)
+        filepaths = list(stamps)
+        parsed = {}
+        for filepath, stamp in stamps.items():
+            cached = _INCLUDE_CACHE.get(filepath)
+            if cached is not None and cached[:2] == stamp:
+                parsed[filepath] = cached[2]
+        changed = [filepath for filepath in filepaths if filepath not in parsed]
+
+        if changed:
+            # Parse changed files concurrently; they are merged below in
+            # sorted order so later files still override earlier ones.
+            with ThreadPoolExecutor(max_workers=min(self.MAX_LOAD_WORKERS, len(changed))) as executor:
+                for filepath, queries in zip(changed, executor.map(self._parse_file, changed)):
+                    parsed[filepath] = queries
+                    _INCLUDE_CACHE[filepath] = (*stamps[filepath], queries)
+        elif filepaths:
+            logger.debug("Named queries include files unchanged, reusing parsed queries")
+
+        for filepath in filepaths:
+            queries = parsed[filepath]
+            if queries:
+                logger.debug(
+                    f"Loaded {len(queries)} named queries from {os.path.basename(filepath)}"
+                )
+                # Merge queries, later files override earlier ones
+                self._included_queries.update(queries)
+            else:
+                logger.debug(f"No named queries found in {os.path.basename(filepath)}")
 
-    def _load_queries_from_file(self, filepath):
-        """Load named queries from a single config file.
+    def _parse_file(self, filepath):
+        """Parse named queries from a single config file.
 
         Files in namedqueries.d can use two formats:
         1. With section: [named queries] followed by key=value pairs
         2. Without section: just key=value pairs (entire file is queries)
 
+        This does not touch instance state, so it is safe to run from
+        worker threads.
+
         Args:
             filepath: Path to the config file to load
+
+        Returns:
+            Dictionary of query_name -> query_string (empty on error)
         """
         try:
             file_config = ConfigObj(filepath, encoding="utf-8")
@@ -146,36 +190,67 @@ class ExtendedNamedQueries(NamedQueries):
                 queries = {k: v for k, v in file_config.items()
                           if not isinstance(v, dict)}
 
-            if queries:
-                logger.debug(
-                    f"Loaded {len(queries)} named queries from {os.path.basename(filepath)}"
-                )
-                # Merge queries, later files override earlier ones
-                self._included_queries.update(queries)
-            else:
-                logger.debug(f"No named queries found in {os.path.basename(filepath)}")
+            return dict(queries)
 
         except Exception as e:
             logger.warning(f"Error loading named queries from {filepath}: {e}")
+            return {}
 
     # Directives that are not queries
     DIRECTIVES = {"includedir"}
 
-    def list(self):
-        """List all named queries from config and include directory.
+    def _build_cache(self):
+        """Precompute the merged view of main config and included queries.
 
-        Returns:
-            List of query names (combined from main config and includes)
+        Must be called whenever the included queries change (load, reload)
+        so that lookups don't go back to the ConfigObj section; save and
+        delete only touch one name and go through _update_cache instead.
+        Changes made to the underlying config object by other means are
+        not visible until reload_includes() is called.
         """
+        self._main_queries_view = dict(self.config.get(self.section_name, {}))
+
         # Get queries from main config (excluding directives)
-        main_queries = {k: v for k, v in self.config.get(self.section_name, {}).items()
+        main_queries = {k: v for k, v in self._main_queries_view.items()
                         if k not in self.DIRECTIVES}
 
         # Combine with included queries (main config takes precedence)
-        all_queries = dict(self._included_queries)
-        all_queries.update(main_queries)
+        merged = {**self._included_queries, **main_queries}
+        self._merged_cache = merged
+        self._sorted_keys_cache = tuple(sorted(merged))
+
+    def _update_cache(self, name):
+        """Bring the merged view up to date for a single saved or deleted name.
+
+        The name list is only re-sorted when the set of names changes.
+        """
+        section = self.config.get(self.section_name, {})
+        if name in section:
+            self._main_queries_view[name] = section[name]
+        else:
+            self._main_queries_view.pop(name, None)
+
+        if name in self.DIRECTIVES:
+            return
 
-        return sorted(all_queries.keys())
+        was_listed = name in self._merged_cache
+        if name in self._main_queries_view:
+            self._merged_cache[name] = self._main_queries_view[name]
+        elif name in self._included_queries:
+            self._merged_cache[name] = self._included_queries[name]
+        else:
+            self._merged_cache.pop(name, None)
+
+        if was_listed != (name in self._merged_cache):
+            self._sorted_keys_cache = tuple(sorted(self._merged_cache))
+
+    def list(self):
+        """List all named queries from config and include directory.
+
+        Returns:
+            List of query names (combined from main config and includes)
+        """
+        return list(self._sorted_keys_cache)
 
     def get(self, name):
         """Get a named query by name.
@@ -192,13 +267,8 @@ class ExtendedNamedQueries(NamedQueries):
         if name in self.DIRECTIVES:
             return None
 
-        # First check main config (takes precedence)
-        main_queries = self.config.get(self.section_name, {})
-        if name in main_queries:
-            return main_queries[name]
-
-        # Then check included queries
-        return self._included_queries.get(name, None)
+        # Main config already takes precedence in the merged view
+        return self._merged_cache.get(name, None)
 
     def get_all(self):
         """Get all named queries as a dictionary.
@@ -206,13 +276,7 @@ class ExtendedNamedQueries(NamedQueries):
         Returns:
             Dictionary of query_name -> query_string
         """
-        # Combine included queries with main config (main takes precedence)
-        # Exclude directives
-        all_queries = dict(self._included_queries)
-        main_queries = {k: v for k, v in self.config.get(self.section_name, {}).items()
-                        if k not in self.DIRECTIVES}
-        all_queries.update(main_queries)
-        return all_queries
+        return dict(self._merged_cache)
 
     def get_source(self, name):
         """Get the source of a named query (main config or include file).
@@ -224,8 +288,7 @@ class ExtendedNamedQueries(NamedQueries):
             'config' if from main config, 'include' if from include directory,
             or None if not found
         """
-        main_queries = self.config.get(self.section_name, {})
-        if name in main_queries:
+        if name in self._main_queries_view:
             return "config"
         if name in self._included_queries:
             return "include"
@@ -235,7 +298,20 @@ class ExtendedNamedQueries(NamedQueries):
         """Reload named queries from the include directory.
 
         This can be called to refresh the included queries without
-        restarting pgcli.
+        restarting pgcli. The include directory itself is resolved once,
+        at construction.
         """
         self._included_queries = {}
         self._load_included_queries()
+        self._build_cache()
+
+    def save(self, name, query):
+        """Save a named query to the main config."""
+        super().save(name, query)
+        self._update_cache(name)
+
+    def delete(self, name):
+        """Delete a named query from the main config."""
+        result = super().delete(name)
+        self._update_cache(name)
+        return result
@@ -16,6 +16,18 @@ _logger = logging.getLogger(__name__)
 
 ViewDef = namedtuple("ViewDef", "nspname relname relkind viewdef reloptions checkoption")
 
+# PASSWORD '...' clauses (CREATE/ALTER USER/ROLE) are masked before sql is logged
+_PASSWORD_RE = re.compile(r"(PASSWORD\s+)'[^']*'", re.IGNORECASE)
+_PASSWORD_PROBE = re.compile(r"password", re.IGNORECASE).search
+
+
+def redact_passwords(sql):
+    """Return sql with PASSWORD literals masked, or sql itself when there are none."""
+    if not _PASSWORD_PROBE(sql):
+        return sql
+    redacted, count = _PASSWORD_RE.subn(r"\1'***'", sql)
+    return redacted if count else sql
+
 
 # we added this funcion to strip beginning comments
 # because sqlparse didn't handle tem well.  It won't be needed if sqlparse
@@ -446,13 +458,8 @@ class PGExecute:
 
     def execute_normal_sql(self, split_sql):
         """Returns tuple (title, rows, headers, status)"""
-        log_sql = re.sub(
-            r"(PASSWORD\s+)'[^']*'",
-            r"\1'***'",
-            split_sql,
-            flags=re.IGNORECASE,
-        )
-        _logger.debug("Regular sql statement. sql: %r", log_sql)
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("Regular sql statement. sql: %r", redact_passwords(split_sql))
 
         title = ""
 
@@ -5,29 +5,166 @@ This module provides reusable SSH tunnel functionality that can be used
 by pgcli, pgcli_dump, pgcli_dumpall, and other tools.
 """
 
+from __future__ import annotations
+
 import atexit
+import functools
 import getpass
+import importlib.util
 import logging
 import os
 import re
+import shutil
+import socket
+import stat
+import subprocess
 import sys
-from typing import Any, Optional, Tuple, cast
-from urllib.parse import urlparse
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple, cast
+from urllib.parse import ParseResult, urlparse
 
 import click
-import paramiko
 
-try:
-    import sshtunnel
+# sshtunnel (and paramiko, which it pulls in) are only imported once a tunnel
+# is actually started, so tools that never open one don't pay for loading them.
+SSH_TUNNEL_SUPPORT = importlib.util.find_spec("sshtunnel") is not None
+
+# Set to 1 to forward through a shared OpenSSH ControlMaster connection
+# instead of sshtunnel, so repeated tool runs skip the SSH handshake.
+CONTROLMASTER_ENV = "PGCLI_SSH_CONTROLMASTER"
+CONTROL_PERSIST = "60s"
+
+# Distinct (host, dsn_alias) lookups remembered per SSHTunnelManager
+_LOOKUP_CACHE_SIZE = 256
+
+# Numbered or named backreferences and conditionals, which would point at the
+# wrong group once a pattern is embedded in a combined alternation.
+_BACKREFERENCE_RE = re.compile(r"\\[1-9]|\\g<|\(\?P=|\(\?\(")
+
+# Pattern shapes that fullmatch the same strings as a plain str comparison,
+# e.g. "db1" (exact), "hello-.*" (prefix), ".*\.com" (suffix), ".*prod.*" (substring).
+_LITERAL_TEXT = r"((?:[A-Za-z0-9_-]|\\\.)+)"
+_LITERAL_SHAPES = (
+    ("exact", re.compile(_LITERAL_TEXT)),
+    ("prefix", re.compile(_LITERAL_TEXT + r"\.\*")),
+    ("suffix", re.compile(r"\.\*" + _LITERAL_TEXT)),
+    ("substring", re.compile(r"\.\*" + _LITERAL_TEXT + r"\.\*")),
+)
+
+
+def _strip_redundant_anchors(regex: str) -> str:
+    """
+    Drop a leading "^" and a trailing "$" from a pattern that is fullmatched.
+
+    fullmatch already anchors both ends, so "^hello-.*$" matches exactly what
+    "hello-.*" does; without the anchors it can take the literal fast path.
+    """
+    if regex.startswith("^") and regex[1:2] not in ("*", "+", "?", "{"):
+        regex = regex[1:]
+    if regex.endswith("$"):
+        # A "$" preceded by an odd number of backslashes is an escaped literal
+        backslashes = len(regex) - 1 - len(regex[:-1].rstrip("\\"))
+        if backslashes % 2 == 0:
+            regex = regex[:-1]
+    return regex
+
+
+def _control_socket_dir() -> Optional[str]:
+    """
+    Return a directory for the ControlMaster socket that only the user can use.
+
+    The socket name is predictable, so in a shared directory such as /tmp
+    another local user could create it first and take over the forward.
+    Returns None when neither $XDG_RUNTIME_DIR nor ~/.ssh is owned by the
+    user and closed to group and others.
+    """
+    if not hasattr(os, "getuid"):
+        return None
+    for candidate in (os.environ.get("XDG_RUNTIME_DIR"), os.path.expanduser("~/.ssh")):
+        if not candidate:
+            continue
+        try:
+            st = os.stat(candidate)
+        except OSError:
+            continue
+        if stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077:
+            return candidate
+    return None
+
+
+@functools.lru_cache(maxsize=32)
+def parse_tunnel_url(tunnel_url: str) -> ParseResult:
+    """Split an SSH tunnel URL, adding the ssh:// scheme urlparse needs to find the host.
+
+    Cached because the same configured URL is split on every tunnel start;
+    the result is an immutable named tuple, so sharing it is safe.
+    """
+    if "://" not in tunnel_url:
+        tunnel_url = f"ssh://{tunnel_url}"
+    return urlparse(tunnel_url)
+
+
+class ControlMasterForward:
+    """A local port forward multiplexed over an OpenSSH ControlMaster socket.
+
+    Mirrors the parts of sshtunnel.SSHTunnelForwarder that SSHTunnelManager
+    uses. Stopping it only cancels the forward; the master connection stays
+    up for ControlPersist so the next invocation can reuse it.
+    """
 
-    SSH_TUNNEL_SUPPORT = True
-except ImportError:
-    SSH_TUNNEL_SUPPORT = False
+    __slots__ = ("ssh_base_args", "forward_spec", "local_bind_ports", "is_active")
+
+    def __init__(self, ssh_base_args: List[str], forward_spec: str, local_port: int):
+        self.ssh_base_args = ssh_base_args
+        self.forward_spec = forward_spec
+        self.local_bind_ports = [local_port]
+        self.is_active = False
+
+    def start(self) -> None:
+        subprocess.run(
+            self.ssh_base_args[:1] + ["-O", "forward", "-L", self.forward_spec] + self.ssh_base_args[1:],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        self.is_active = True
+
+    def stop(self) -> None:
+        self.is_active = False
+        subprocess.run(
+            self.ssh_base_args[:1] + ["-O", "cancel", "-L", self.forward_spec] + self.ssh_base_args[1:],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
 
 
 class SSHTunnelManager:
     """Manages SSH tunnel connections for database tools."""
 
+    __slots__ = (
+        "ssh_tunnel_url",
+        "ssh_tunnel_config",
+        "dsn_ssh_tunnel_config",
+        "logger",
+        "tunnel",
+        "allow_agent",
+        "_compiled_host_patterns",
+        "_compiled_dsn_patterns",
+        "_host_matcher",
+        "_dsn_matcher",
+        "_host_literals",
+        "_dsn_literals",
+        "_lookups",
+        "_has_any_tunnel_config",
+        "_lookup_cache",
+    )
+
+    # SSHTunnelForwarder arguments that are the same for every tunnel
+    _BASE_TUNNEL_KWARGS = MappingProxyType({
+        "local_bind_address": ("127.0.0.1",),
+        "ssh_config_file": None,  # Don't let sshtunnel read config (it picks up IdentityFile)
+        "compression": False,
+    })
+
     def __init__(
         self,
         ssh_tunnel_url: Optional[str] = None,
@@ -52,6 +189,141 @@ class SSHTunnelManager:
         self.logger = logger or logging.getLogger(__name__)
         self.tunnel: Optional[Any] = None
         self.allow_agent = allow_agent
+        self._lookup_cache: Dict[Tuple[Optional[str], Optional[str]], Optional[str]] = {}
+        self._compiled_host_patterns = self._compile_patterns(self.ssh_tunnel_config)
+        self._compiled_dsn_patterns = self._compile_patterns(self.dsn_ssh_tunnel_config)
+        self._host_matcher = self._combine_patterns(self._compiled_host_patterns)
+        self._dsn_matcher = self._combine_patterns(self._compiled_dsn_patterns)
+        self._host_literals = self._literal_patterns(self._compiled_host_patterns)
+        self._dsn_literals = self._literal_patterns(self._compiled_dsn_patterns)
+        # Non-empty sections in precedence order, DSN first:
+        # (label, matches_dsn_alias, compiled, matcher, literals)
+        self._lookups = tuple(
+            lookup
+            for lookup in (
+                ("DSN", True, self._compiled_dsn_patterns, self._dsn_matcher, self._dsn_literals),
+                ("host", False, self._compiled_host_patterns, self._host_matcher, self._host_literals),
+            )
+            if lookup[2]
+        )
+        self._has_any_tunnel_config = bool(ssh_tunnel_url or self._compiled_host_patterns or self._compiled_dsn_patterns)
+
+    def _compile_patterns(self, tunnel_config: dict) -> List[Tuple[Pattern, str]]:
+        """
+        Compile regex -> tunnel_url mappings once, skipping invalid patterns.
+
+        Args:
+            tunnel_config: Dict of regex -> tunnel_url mappings
+
+        Returns:
+            List of (compiled_pattern, tunnel_url) tuples, in config order
+        """
+        compiled = []
+        for regex, tunnel_url in tunnel_config.items():
+            unanchored = _strip_redundant_anchors(regex)
+            if unanchored != regex:
+                self.logger.debug("Matching SSH tunnel pattern '%s' as '%s'", regex, unanchored)
+                regex = unanchored
+            try:
+                compiled.append((re.compile(regex), tunnel_url))
+            except re.error as e:
+                self.logger.warning("Ignoring invalid SSH tunnel pattern '%s': %s", regex, e)
+        return compiled
+
+    @staticmethod
+    def _combine_patterns(compiled: List[Tuple[Pattern, str]]) -> Optional[Pattern]:
+        """
+        Join compiled patterns into one alternation, one named group each.
+
+        Alternatives are tried in order, so the group that fullmatches is
+        the first pattern that would have matched on its own. Returns None
+        (and lookups scan the list instead) for a single pattern, or when
+        patterns can't be combined safely: flags differ, backreferences
+        would be renumbered, or group names clash.
+        """
+        if len(compiled) < 2:
+            return None
+        flags = {pattern.flags for pattern, _ in compiled}
+        if len(flags) > 1 or any(_BACKREFERENCE_RE.search(pattern.pattern) for pattern, _ in compiled):
+            return None
+        try:
+            return re.compile(
+                "|".join(f"(?P<_t{i}>{pattern.pattern})" for i, (pattern, _) in enumerate(compiled)),
+                flags.pop(),
+            )
+        except re.error:
+            return None
+
+    @staticmethod
+    def _literal_patterns(
+        compiled: List[Tuple[Pattern, str]],
+    ) -> Optional[Tuple[Dict[str, int], List[Tuple[int, str, str]]]]:
+        """
+        Turn patterns into string tests, if every one of them has a literal shape.
+
+        Exact names go into a dict of name -> first position, so configs
+        listing many specific hosts need one lookup rather than a scan;
+        the other shapes become (position, kind, needle) tests in config order.
+
+        Returns None when any pattern needs the regex engine, so a section
+        is either matched entirely with str comparisons or entirely with regexes.
+        """
+        exact: Dict[str, int] = {}
+        others = []
+        for index, (pattern, _) in enumerate(compiled):
+            if pattern.flags != re.UNICODE:
+                return None
+            for kind, shape in _LITERAL_SHAPES:
+                shape_match = shape.fullmatch(pattern.pattern)
+                if shape_match:
+                    needle = shape_match.group(1).replace("\\.", ".")
+                    if kind == "exact":
+                        exact.setdefault(needle, index)
+                    else:
+                        others.append((index, kind, needle))
+                    break
+            else:
+                return None
+        return exact, others
+
+    @staticmethod
+    def _literal_match(kind: str, needle: str, subject: str) -> bool:
+        """Apply a prefix, suffix or substring test from _literal_patterns to subject."""
+        # Like the regex it replaces, ".*" never spans a newline
+        if "\n" in subject:
+            return False
+        if kind == "prefix":
+            return subject.startswith(needle)
+        if kind == "suffix":
+            return subject.endswith(needle)
+        return needle in subject
+
+    @classmethod
+    def _match_pattern(
+        cls,
+        compiled: List[Tuple[Pattern, str]],
+        matcher: Optional[Pattern],
+        literals: Optional[Tuple[Dict[str, int], List[Tuple[int, str, str]]]],
+        subject: str,
+    ) -> Optional[Tuple[Pattern, str]]:
+        """Return the first (pattern, tunnel_url) whose pattern fullmatches subject."""
+        if literals is not None:
+            exact, others = literals
+            # Only the non-exact tests placed before an exact hit can take precedence over it
+            first_exact = exact.get(subject, len(compiled))
+            for index, kind, needle in others:
+                if index > first_exact:
+                    break
+                if cls._literal_match(kind, needle, subject):
+                    return compiled[index]
+            return compiled[first_exact] if first_exact < len(compiled) else None
+        if matcher is not None:
+            match = matcher.fullmatch(subject)
+            return compiled[int(match.lastgroup[2:])] if match else None
+        for pattern, tunnel_url in compiled:
+            if pattern.fullmatch(subject):
+                return pattern, tunnel_url
+        return None
 
     def find_tunnel_url(
         self,
@@ -68,36 +340,67 @@ class SSHTunnelManager:
         Returns:
             Matching tunnel URL or None
         """
+        # Nothing configured at all: the common, no-tunnel case
+        if not self._has_any_tunnel_config:
+            return None
+
         # First, check if we already have an explicit URL
         if self.ssh_tunnel_url:
             return self.ssh_tunnel_url
 
-        # Check DSN-based tunnel config
-        if dsn_alias and self.dsn_ssh_tunnel_config:
-            for dsn_regex, tunnel_url in self.dsn_ssh_tunnel_config.items():
-                if re.fullmatch(dsn_regex, dsn_alias):
-                    self.logger.debug(
-                        "Found SSH tunnel for DSN '%s' matching '%s': %s",
-                        dsn_alias,
-                        dsn_regex,
-                        tunnel_url,
-                    )
-                    return cast(str, tunnel_url)
-
-        # Check host-based tunnel config
-        if host and self.ssh_tunnel_config:
-            for host_regex, tunnel_url in self.ssh_tunnel_config.items():
-                if re.fullmatch(host_regex, host):
-                    self.logger.debug(
-                        "Found SSH tunnel for host '%s' matching '%s': %s",
-                        host,
-                        host_regex,
-                        tunnel_url,
-                    )
-                    return cast(str, tunnel_url)
+        # The patterns never change, so neither does the answer for a given lookup
+        key = (host, dsn_alias)
+        try:
+            return self._lookup_cache[key]
+        except KeyError:
+            pass
+        tunnel_url = self._match_lookups(host, dsn_alias)
+        if len(self._lookup_cache) >= _LOOKUP_CACHE_SIZE:
+            self._lookup_cache.clear()
+        self._lookup_cache[key] = tunnel_url
+        return tunnel_url
+
+    def _match_lookups(self, host: Optional[str], dsn_alias: Optional[str]) -> Optional[str]:
+        """Check DSN-based, then host-based tunnel config."""
+        for label, matches_dsn_alias, compiled, matcher, literals in self._lookups:
+            subject = dsn_alias if matches_dsn_alias else host
+            if not subject:
+                continue
+            found = self._match_pattern(compiled, matcher, literals, subject)
+            if found:
+                pattern, tunnel_url = found
+                self.logger.debug(
+                    "Found SSH tunnel for %s '%s' matching '%s': %s",
+                    label,
+                    subject,
+                    pattern.pattern,
+                    tunnel_url,
+                )
+                return cast(str, tunnel_url)
 
         return None
 
+    def find_tunnel_urls_batch(self, hosts: Iterable[str]) -> List[Optional[str]]:
+        """
+        Find matching SSH tunnel URLs for several hosts at once.
+
+        Each distinct host is matched once, so repeated hosts come from the
+        results already found.
+
+        Args:
+            hosts: Database hosts to match against ssh_tunnel_config
+
+        Returns:
+            A tunnel URL or None for each host, in the same order
+        """
+        found: Dict[str, Optional[str]] = {}
+        urls = []
+        for host in hosts:
+            if host not in found:
+                found[host] = self.find_tunnel_url(host=host)
+            urls.append(found[host])
+        return urls
+
     def start_tunnel(
         self,
         host: str,
@@ -125,6 +428,11 @@ class SSHTunnelManager:
             self.logger.debug("No SSH tunnel configured for host=%s, dsn=%s", host, dsn_alias)
             return host, port
 
+        if os.environ.get(CONTROLMASTER_ENV) == "1":
+            forwarded = self._start_controlmaster_tunnel(tunnel_url, host, port)
+            if forwarded:
+                return forwarded
+
         # Verify sshtunnel is available
         if not SSH_TUNNEL_SUPPORT:
             click.secho(
@@ -135,11 +443,10 @@ class SSHTunnelManager:
             )
             sys.exit(1)
 
-        # Add protocol if missing
-        if "://" not in tunnel_url:
-            tunnel_url = f"ssh://{tunnel_url}"
+        import paramiko
+        import sshtunnel
 
-        tunnel_info = urlparse(tunnel_url)
+        tunnel_info = parse_tunnel_url(tunnel_url)
         ssh_hostname = tunnel_info.hostname
         ssh_port = tunnel_info.port or 22
         ssh_username = tunnel_info.username
@@ -167,14 +474,12 @@ class SSHTunnelManager:
                 self.logger.warning("Could not read SSH config: %s", e)
 
         params = {
-            "local_bind_address": ("127.0.0.1",),
+            **self._BASE_TUNNEL_KWARGS,
             "remote_bind_address": (host, int(port)),
             "ssh_address_or_host": (ssh_hostname, ssh_port),
             "logger": self.logger,
-            "ssh_config_file": None,  # Don't let sshtunnel read config (it picks up IdentityFile)
             "allow_agent": self.allow_agent,
             "host_pkey_directories": [],  # Don't scan ~/.ssh/ for keys, use ssh-agent only
-            "compression": False,
         }
 
         if ssh_username:
@@ -189,8 +494,9 @@ class SSHTunnelManager:
         # Hack: sshtunnel adds a console handler to the logger, so we revert handlers.
         logger_handlers = self.logger.handlers.copy()
         try:
-            log_params = {k: ("***" if k == "ssh_password" else v) for k, v in params.items()}
-            self.logger.debug("Creating SSH tunnel with params: %r", log_params)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                log_params = {k: ("***" if k == "ssh_password" else v) for k, v in params.items()}
+                self.logger.debug("Creating SSH tunnel with params: %r", log_params)
             tunnel = sshtunnel.SSHTunnelForwarder(**params)
             self.tunnel = tunnel
             self.logger.debug("SSH tunnel created, calling start()...")
@@ -215,12 +521,97 @@ class SSHTunnelManager:
 
         return "127.0.0.1", local_port
 
+    def _start_controlmaster_tunnel(self, tunnel_url: str, host: str, port: int) -> Optional[Tuple[str, int]]:
+        """
+        Forward a local port through a shared OpenSSH ControlMaster.
+
+        The first call opens a master connection on a socket under
+        $XDG_RUNTIME_DIR or ~/.ssh; later calls (including from other
+        processes) reuse it while it persists, avoiding a full SSH handshake
+        per run.
+
+        Returns:
+            (local_host, local_port), or None to fall back to sshtunnel
+            (no ssh binary, password in URL, no private socket directory, or
+            the master failed to start)
+        """
+        ssh_path = shutil.which("ssh")
+        if not ssh_path:
+            self.logger.debug("ssh binary not found, not using ControlMaster")
+            return None
+
+        tunnel_info = parse_tunnel_url(tunnel_url)
+        if tunnel_info.password or not tunnel_info.hostname:
+            self.logger.debug("Tunnel URL not usable with ControlMaster, using sshtunnel")
+            return None
+
+        socket_dir = _control_socket_dir()
+        if not socket_dir:
+            self.logger.debug("No private directory for the ControlMaster socket, using sshtunnel")
+            return None
+
+        target = tunnel_info.hostname
+        if tunnel_info.username:
+            target = f"{tunnel_info.username}@{target}"
+        ssh_base_args = [
+            ssh_path,
+            "-o",
+            f"ControlPath={os.path.join(socket_dir, 'pgcli-ssh-%r@%h:%p')}",
+        ]
+        if tunnel_info.port:
+            ssh_base_args += ["-p", str(tunnel_info.port)]
+        ssh_base_args.append(target)
+
+        try:
+            check = subprocess.run(
+                ssh_base_args[:1] + ["-O", "check"] + ssh_base_args[1:],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            if check.returncode != 0:
+                self.logger.debug("Starting SSH ControlMaster for %s", target)
+                # -f returns once authentication is done and the master is up
+                subprocess.run(
+                    ssh_base_args[:1]
+                    + ["-M", "-N", "-f", "-o", "ControlMaster=yes", "-o", f"ControlPersist={CONTROL_PERSIST}"]
+                    + ssh_base_args[1:],
+                    check=True,
+                )
+            else:
+                self.logger.debug("Reusing SSH ControlMaster for %s", target)
+
+            # Reserve a free local port to hand to the master
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind(("127.0.0.1", 0))
+                local_port = sock.getsockname()[1]
+
+            tunnel = ControlMasterForward(ssh_base_args, f"127.0.0.1:{local_port}:{host}:{int(port)}", local_port)
+            tunnel.start()
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.logger.warning("SSH ControlMaster tunnel failed, falling back to sshtunnel: %s", e)
+            return None
+
+        self.tunnel = tunnel
+        atexit.register(self.stop_tunnel)
+        self.logger.debug("SSH ControlMaster forward ready, local port: %d", local_port)
+        return "127.0.0.1", local_port
+
     def stop_tunnel(self):
-        """Stop the SSH tunnel if running."""
-        if self.tunnel and self.tunnel.is_active:
-            self.logger.debug("Stopping SSH tunnel")
-            self.tunnel.stop()
-            self.tunnel = None
+        """Stop the SSH tunnel if running.
+
+        Safe to call more than once; the atexit hook is dropped on the first
+        call so interpreter shutdown doesn't touch an already closed tunnel.
+        """
+        atexit.unregister(self.stop_tunnel)
+        tunnel, self.tunnel = self.tunnel, None
+        if tunnel is None:
+            return
+        try:
+            if tunnel.is_active:
+                self.logger.debug("Stopping SSH tunnel")
+                tunnel.stop()
+        except Exception:
+            self.logger.debug("SSH tunnel already closed", exc_info=True)
 
 
 def get_tunnel_manager_from_config(
@@ -1,4 +1,5 @@
 import os
+import psycopg
 import pytest
 from utils import (
     POSTGRES_HOST,
@@ -29,9 +30,11 @@ def cursor(connection):
         return cur
 
 
-@pytest.fixture
-def executor(connection):
-    return pgcli.pgexecute.PGExecute(
+@pytest.fixture(scope="session")
+def session_executor():
+    """One PGExecute connection for the whole run; see executor."""
+    create_db("_test_db")
+    executor = pgcli.pgexecute.PGExecute(
         database="_test_db",
         user=POSTGRES_USER,
         host=POSTGRES_HOST,
@@ -40,6 +43,41 @@ def executor(connection):
         dsn=None,
         notify_callback=pgcli.main.notify_callback,
     )
+    yield executor
+    executor.conn.close()
+
+
+@pytest.fixture
+def executor(connection, session_executor):
+    yield session_executor
+
+    # Hand the next test a clean session: end any open transaction, then drop
+    # SET values, LISTEN registrations, prepared statements and temp tables.
+    conn = session_executor.conn
+    try:
+        with conn.cursor() as cur:
+            if conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+                cur.execute("ROLLBACK")
+            cur.execute("DISCARD ALL")
+    except psycopg.Error:
+        # The test closed or broke the connection, so start over on a new one
+        session_executor.connect()
+    session_executor.reset_expanded = None
+
+
+@pytest.fixture(scope="session")
+def pgcli_rcfile(tmp_path_factory):
+    """A throwaway rcfile shared by the whole session; get_config() caches its parse."""
+    rcdir = tmp_path_factory.mktemp("pgcli")
+    rcfile = rcdir / "config"
+    rcfile.write_text(f"[main]\nlog_file = {rcdir / 'pgcli.log'}\n")
+    return str(rcfile)
+
+
+@pytest.fixture(name="pgcli")
+def pgcli_instance(pgcli_rcfile):
+    """A fresh PGCli per test, so no state leaks between tests."""
+    return pgcli.main.PGCli(pgclirc_file=pgcli_rcfile)
 
 
 @pytest.fixture
@@ -52,3 +90,6 @@ def temp_config(tmpdir_factory):
     # this function runs on start of test session.
     # use temporary directory for config home so user config will not be used
     os.environ["XDG_CONFIG_HOME"] = str(tmpdir_factory.mktemp("data"))
+    # tests mock get_config(), so a config snapshot shared between them would leak
+    os.environ["XDG_CACHE_HOME"] = str(tmpdir_factory.mktemp("cache"))
+    os.environ["PGCLI_NO_CONFIG_CACHE"] = "1"
@@ -1,5 +1,6 @@
 import copy
 import os
+from concurrent.futures import ThreadPoolExecutor
 import shutil
 import signal
 import sys
@@ -146,6 +147,32 @@ def after_all(context):
             os.environ[k] = v
 
 
+def before_feature(context, feature):
+    """Start every pgcli_dump/pgcli_dumpall help or version run up front.
+
+    The runs go through a thread pool, so their process start-up overlaps;
+    the @when steps then just reap the finished result.
+    """
+    keys = set()
+    for scenario in feature.walk_scenarios():
+        for step in scenario.steps:
+            match = wrappers.DUMP_STEP_RE.fullmatch(step.name)
+            if match and wrappers.DUMP_CACHEABLE_OPTIONS_RE.fullmatch(match.group(2).strip()):
+                keys.add(match.groups())
+    if not keys:
+        return
+    context.dump_executor = ThreadPoolExecutor(max_workers=len(keys))
+    context.config.userdata["_dump_pending"] = {key: context.dump_executor.submit(wrappers.run_dump_tool, *key) for key in keys}
+
+
+def after_feature(context, feature):
+    executor = getattr(context, "dump_executor", None)
+    if executor is not None:
+        executor.shutdown(wait=True)
+        context.dump_executor = None
+        context.config.userdata.pop("_dump_pending", None)
+
+
 def before_step(context, _):
     context.atprompt = False
 
@@ -1,143 +1,130 @@
 """Behave step definitions for pgcli_dump and pgcli_dumpall commands."""
 
-import subprocess
-from behave import when, then
-
-
-@when("we run pgcli_dump with {options}")
-def step_run_pgcli_dump(context, options):
-    """Run pgcli_dump with given options."""
-    cmd = f"pgcli_dump {options}"
-    context.cmd = cmd
-    try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        context.exit_code = result.returncode
-        context.stdout = result.stdout
-        context.stderr = result.stderr
-    except subprocess.TimeoutExpired:
-        context.exit_code = -1
-        context.stdout = ""
-        context.stderr = "Command timed out"
-
-
-@when("we run pgcli_dumpall with {options}")
-def step_run_pgcli_dumpall(context, options):
-    """Run pgcli_dumpall with given options."""
-    cmd = f"pgcli_dumpall {options}"
-    context.cmd = cmd
-    try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        context.exit_code = result.returncode
-        context.stdout = result.stdout
-        context.stderr = result.stderr
-    except subprocess.TimeoutExpired:
-        context.exit_code = -1
-        context.stdout = ""
-        context.stderr = "Command timed out"
-
-
-@then("we see pgcli_dump help output")
-def step_see_pgcli_dump_help(context):
-    """Verify pgcli_dump help output is shown."""
-    output = context.stdout + context.stderr
-    assert "pg_dump wrapper with SSH tunnel support" in output, f"Expected help text not found in: {output}"
-    assert "--ssh-tunnel" in output, f"Expected --ssh-tunnel option not found in: {output}"
-
-
-@then("we see pgcli_dumpall help output")
-def step_see_pgcli_dumpall_help(context):
-    """Verify pgcli_dumpall help output is shown."""
-    output = context.stdout + context.stderr
-    assert "pg_dumpall wrapper with SSH tunnel support" in output, f"Expected help text not found in: {output}"
-    assert "--ssh-tunnel" in output, f"Expected --ssh-tunnel option not found in: {output}"
-
-
-@then("pgcli_dump exits successfully")
-def step_pgcli_dump_exits_successfully(context):
-    """Verify pgcli_dump exits with code 0."""
-    assert context.exit_code == 0, f"Expected exit code 0, got {context.exit_code}. stderr: {context.stderr}"
-
-
-@then("pgcli_dumpall exits successfully")
-def step_pgcli_dumpall_exits_successfully(context):
-    """Verify pgcli_dumpall exits with code 0."""
-    assert context.exit_code == 0, f"Expected exit code 0, got {context.exit_code}. stderr: {context.stderr}"
-
-
-@then("we see pg_dump version output")
-def step_see_pg_dump_version(context):
-    """Verify pg_dump version output is shown."""
-    output = context.stdout + context.stderr
-    # pg_dump --version outputs something like "pg_dump (PostgreSQL) 16.1"
-    assert "pg_dump" in output.lower() or "postgresql" in output.lower(), \
-        f"Expected pg_dump version info not found in: {output}"
-
-
-@then("we see pg_dumpall version output")
-def step_see_pg_dumpall_version(context):
-    """Verify pg_dumpall version output is shown."""
-    output = context.stdout + context.stderr
-    # pg_dumpall --version outputs something like "pg_dumpall (PostgreSQL) 16.1"
-    assert "pg_dumpall" in output.lower() or "postgresql" in output.lower(), \
-        f"Expected pg_dumpall version info not found in: {output}"
-
-
-@then("pgcli_dump attempts database connection")
-def step_pgcli_dump_attempts_connection(context):
-    """Verify pgcli_dump attempted to connect (may fail without valid DB)."""
-    # The command should have run pg_dump, which may fail with connection error
-    # but that's expected - we just verify it tried
-    output = context.stdout + context.stderr
-    # Accept either success or connection error (means pg_dump was invoked)
-    connection_attempted = (
-        context.exit_code == 0 or
-        "connection" in output.lower() or
-        "password" in output.lower() or
-        "could not connect" in output.lower() or
-        "fe_sendauth" in output.lower() or
-        "ssl" in output.lower()
+import re
+
+import parse
+from behave import register_type, when, then
+
+import wrappers
+
+
+@parse.with_pattern(r"pgcli_dump(?:all)?")
+def _parse_dump_tool(text):
+    return text
+
+
+@parse.with_pattern(r"pg_dump(?:all)?")
+def _parse_pg_dump_program(text):
+    return text
+
+
+# {tool:DumpTool} only matches the two wrappers, so these steps can't
+# shadow other "... exits successfully"-style steps.
+register_type(DumpTool=_parse_dump_tool, PgDumpProgram=_parse_pg_dump_program)
+
+# Any of these in the output means pg_dump/pg_dumpall got as far as connecting
+_CONN_ATTEMPT_RE = re.compile(r"connection|password|could not connect|fe_sendauth|ssl", re.IGNORECASE)
+
+
+def _run_tool(context, binary, options):
+    """Run a pgcli dump wrapper and store its exit code and output on context.
+
+    Help and version runs are memoized in the behave userdata, keyed by
+    (binary, options), so repeated scenarios don't spawn the tool again.
+    Runs prefetched by before_feature are picked up from there.
+    """
+    context.cmd = " ".join(wrappers.dump_tool_argv(binary, options))
+    key = (binary, options)
+    cache = context.config.userdata.setdefault("_dump_cache", {})
+    result = cache.get(key)
+    if result is None:
+        pending = context.config.userdata.get("_dump_pending", {}).pop(key, None)
+        result = pending.result() if pending is not None else wrappers.run_dump_tool(binary, options)
+        if wrappers.DUMP_CACHEABLE_OPTIONS_RE.fullmatch(options.strip()):
+            cache[key] = result
+
+    context.exit_code, context.stdout, context.stderr = result
+    # The streams don't change after the run, so the @then steps share one copy
+    context.combined_output = context.stdout + context.stderr
+
+
+@when("we run {tool:DumpTool} with {options}")
+def step_run_dump_tool(context, tool, options):
+    """Run pgcli_dump or pgcli_dumpall with given options."""
+    _run_tool(context, tool, options)
+
+
+def _assert(condition, message):
+    """Assert condition, building the failure message only when it fails."""
+    assert condition, message()
+
+
+def _in_output(context, text):
+    """Check the captured stdout and stderr for text."""
+    return text in context.combined_output
+
+
+@then("we see {tool:DumpTool} help output")
+def step_see_dump_tool_help(context, tool):
+    """Verify the wrapper's help output is shown."""
+    description = f"{tool.replace('pgcli_', 'pg_', 1)} wrapper with SSH tunnel support"
+    _assert(
+        _in_output(context, description),
+        lambda: f"Expected help text not found in: {context.combined_output}",
+    )
+    _assert(
+        _in_output(context, "--ssh-tunnel"),
+        lambda: f"Expected --ssh-tunnel option not found in: {context.combined_output}",
+    )
+
+
+@then("{tool:DumpTool} exits successfully")
+def step_dump_tool_exits_successfully(context, tool):
+    """Verify the wrapper exits with code 0."""
+    _assert(
+        context.exit_code == 0,
+        lambda: f"Expected exit code 0, got {context.exit_code}. stderr: {context.stderr}",
+    )
+
+
+@then("we see {program:PgDumpProgram} version output")
+def step_see_pg_dump_program_version(context, program):
+    """Verify pg_dump/pg_dumpall version output is shown."""
+    output = context.combined_output.lower()
+    # --version outputs something like "pg_dump (PostgreSQL) 16.1"
+    _assert(
+        program in output or "postgresql" in output,
+        lambda: f"Expected {program} version info not found in: {context.combined_output}",
     )
-    assert connection_attempted, \
-        f"Expected connection attempt, got exit_code={context.exit_code}, output: {output}"
-
-
-@then("pgcli_dumpall attempts database connection")
-def step_pgcli_dumpall_attempts_connection(context):
-    """Verify pgcli_dumpall attempted to connect (may fail without valid DB)."""
-    output = context.stdout + context.stderr
-    connection_attempted = (
-        context.exit_code == 0 or
-        "connection" in output.lower() or
-        "password" in output.lower() or
-        "could not connect" in output.lower() or
-        "fe_sendauth" in output.lower() or
-        "ssl" in output.lower()
+
+
+@then("{tool:DumpTool} attempts database connection")
+def step_dump_tool_attempts_connection(context, tool):
+    """Verify the wrapper attempted to connect (may fail without valid DB)."""
+    # The command should have run pg_dump/pg_dumpall, which may fail with a
+    # connection error, but that's expected - we just verify it tried
+    output = context.combined_output
+    # Accept either success or connection error (means the tool was invoked)
+    connection_attempted = context.exit_code == 0 or _CONN_ATTEMPT_RE.search(output) is not None
+    _assert(
+        connection_attempted,
+        lambda: f"Expected connection attempt, got exit_code={context.exit_code}, output: {output}",
     )
-    assert connection_attempted, \
-        f"Expected connection attempt, got exit_code={context.exit_code}, output: {output}"
 
 
 @then("we see ssh-tunnel option in help")
 def step_see_ssh_tunnel_in_help(context):
     """Verify --ssh-tunnel option is shown in help."""
-    output = context.stdout + context.stderr
-    assert "--ssh-tunnel" in output, f"Expected --ssh-tunnel option not found in: {output}"
+    _assert(
+        _in_output(context, "--ssh-tunnel"),
+        lambda: f"Expected --ssh-tunnel option not found in: {context.combined_output}",
+    )
 
 
 @then("we see dsn option in help")
 def step_see_dsn_in_help(context):
     """Verify --dsn option is shown in help."""
-    output = context.stdout + context.stderr
-    assert "--dsn" in output, f"Expected --dsn option not found in: {output}"
+    _assert(
+        _in_output(context, "--dsn"),
+        lambda: f"Expected --dsn option not found in: {context.combined_output}",
+    )
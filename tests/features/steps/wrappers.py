@@ -1,9 +1,16 @@
 import re
+import shlex
+import subprocess
 import pexpect
 import textwrap
 
 from io import StringIO
 
+# pgcli_dump / pgcli_dumpall steps, and the options whose output never
+# depends on the database (so one run can serve every scenario asking for it).
+DUMP_STEP_RE = re.compile(r"we run (pgcli_dump(?:all)?) with (.+)")
+DUMP_CACHEABLE_OPTIONS_RE = re.compile(r"(?:-v\s+)?--(?:help|version)")
+
 
 def expect_exact(context, expected, timeout):
     timedout = False
@@ -65,3 +72,33 @@ def wait_prompt(context):
     """Make sure prompt is displayed."""
     prompt_str = "{0}>".format(context.currentdb)
     expect_exact(context, [prompt_str + " ", prompt_str, pexpect.EOF], timeout=3)
+
+
+def dump_tool_argv(binary, options):
+    """Build the argument vector for a pgcli dump wrapper step."""
+    return [binary, *shlex.split(options)]
+
+
+def run_dump_tool(binary, options):
+    """Run a pgcli dump wrapper and return (exit_code, stdout, stderr).
+
+    The tool is exec'd directly rather than through /bin/sh.
+    """
+    try:
+        result = subprocess.run(
+            dump_tool_argv(binary, options),
+            shell=False,
+            capture_output=True,
+            timeout=30,
+        )
+    except subprocess.TimeoutExpired:
+        return -1, "", "Command timed out"
+    except FileNotFoundError as e:
+        # Same exit status the shell used to report for a missing command
+        return 127, "", str(e)
+    # Capture raw bytes and decode each stream once at the end
+    return (
+        result.returncode,
+        result.stdout.decode("utf-8", "replace"),
+        result.stderr.decode("utf-8", "replace"),
+    )
@@ -1,8 +1,13 @@
 """Tests for pgcli_dump and pgcli_dumpall wrappers."""
 
+import logging
 import os
+import shutil
 import subprocess
+import sys
 import tempfile
+from contextlib import ExitStack
+from types import MappingProxyType, SimpleNamespace
 import pytest
 from unittest.mock import patch, MagicMock, call
 from click.testing import CliRunner
@@ -20,9 +25,133 @@ from pgcli.dumpall import (
     parse_connection_args as parse_connection_args_dumpall,
     build_tunneled_args as build_tunneled_args_dumpall,
     setup_logging as setup_logging_dumpall,
+    _grow_stdout_pipe,
+    _scan_connection_args,
+    STDOUT_PIPE_SIZE,
 )
 from pgcli.ssh_tunnel import SSHTunnelManager, get_tunnel_manager_from_config
 
+# Stand-ins for subprocess.run's result; the wrappers only read returncode
+_OK = SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+_FAIL = SimpleNamespace(returncode=1, stdout=b"", stderr=b"")
+
+_HAS_PG_DUMP = shutil.which("pg_dump") is not None
+_HAS_PG_DUMPALL = shutil.which("pg_dumpall") is not None
+
+
+@pytest.fixture(autouse=True)
+def no_exec():
+    """Keep pgcli_dumpall in-process: without a tunnel it would exec pg_dumpall."""
+    with patch("pgcli.dumpall.os.execvp", side_effect=OSError("exec disabled in tests")):
+        yield
+
+
+@pytest.fixture(scope="session")
+def pg_env_defaults():
+    """(host, port) that parse_connection_args falls back to in this environment."""
+    return os.environ.get("PGHOST", "localhost"), int(os.environ.get("PGPORT", 5432))
+
+
+@pytest.fixture(scope="session")
+def ssh_tunnels_config():
+    """Read-only config with an [ssh tunnels] host pattern."""
+    return MappingProxyType({
+        "ssh tunnels": MappingProxyType({r".*\.prod\.example\.com": "bastion.example.com"}),
+    })
+
+
+@pytest.fixture(scope="session")
+def dsn_ssh_tunnels_config():
+    """Read-only config with a [dsn ssh tunnels] pattern."""
+    return MappingProxyType({
+        "dsn ssh tunnels": MappingProxyType({"prod-.*": "ssh://bastion.example.com:22"}),
+    })
+
+
+@pytest.fixture(scope="module")
+def runner():
+    """A CliRunner shared by the CLI tests; it keeps no state between invokes."""
+    return CliRunner()
+
+
+@pytest.fixture
+def _logging_state():
+    """Restore the pgcli_dump logger after setup_logging() reconfigures it."""
+    logger = logging.getLogger("pgcli_dump")
+    prev_level, prev_handlers = logger.level, logger.handlers[:]
+    yield
+    logger.setLevel(prev_level)
+    logger.handlers[:] = prev_handlers
+
+
+def _run_cli(command, argv):
+    """Run a wrapper in-process without CliRunner's stdio redirection.
+
+    For tests that only look at the mocks, not at the output. Returns the
+    exit code.
+    """
+    try:
+        command.main(list(argv), prog_name=command.name, standalone_mode=False)
+    except SystemExit as e:
+        return e.code
+    return 0
+
+
+@pytest.fixture(scope="session")
+def dump_help():
+    """pgcli_dump --help result; the help text is static, so render it once."""
+    return CliRunner().invoke(dump_cli, ["--help"])
+
+
+@pytest.fixture(scope="session")
+def dumpall_help():
+    """pgcli_dumpall --help result; the help text is static, so render it once."""
+    return CliRunner().invoke(dumpall_cli, ["--help"])
+
+
+def _cli_patches(module):
+    """Patch subprocess.run, get_config and the tunnel factory of a wrapper module."""
+    with ExitStack() as stack:
+        yield SimpleNamespace(
+            run=stack.enter_context(patch(f"{module}.subprocess.run")),
+            config=stack.enter_context(patch(f"{module}.get_config")),
+            # wraps: unless a test sets a return_value, the real factory is used
+            tunnel_manager=stack.enter_context(
+                patch(f"{module}.get_tunnel_manager_from_config", wraps=get_tunnel_manager_from_config)
+            ),
+        )
+
+
+def _reset_cli_mocks(mocks):
+    """Reset the class-wide mocks to their defaults before each test."""
+    for mock in vars(mocks).values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    mocks.run.return_value = _OK
+    mocks.config.return_value = {}
+    return mocks
+
+
+@pytest.fixture(scope="class")
+def _dump_patches():
+    yield from _cli_patches("pgcli.dump")
+
+
+@pytest.fixture(scope="class")
+def _dumpall_patches():
+    yield from _cli_patches("pgcli.dumpall")
+
+
+@pytest.fixture
+def dump_mocks(_dump_patches):
+    """Mocks for pgcli.dump's subprocess.run, get_config and tunnel factory."""
+    return _reset_cli_mocks(_dump_patches)
+
+
+@pytest.fixture
+def dumpall_mocks(_dumpall_patches):
+    """Mocks for pgcli.dumpall's subprocess.run, get_config and tunnel factory."""
+    return _reset_cli_mocks(_dumpall_patches)
+
 
 class TestParseConnectionArgs:
     """Tests for parse_connection_args function."""
@@ -70,12 +199,11 @@ class TestParseConnectionArgs:
         assert port == 5433
         assert has_port is True
 
-    def test_default_values(self):
+    def test_default_values(self, pg_env_defaults):
         """Test default values when no host/port specified."""
         args = ["-d", "mydb", "-U", "myuser"]
         host, port, remaining, has_host, has_port = parse_connection_args(args)
-        assert host == os.environ.get("PGHOST", "localhost")
-        assert port == int(os.environ.get("PGPORT", 5432))
+        assert (host, port) == pg_env_defaults
         assert has_host is False
         assert has_port is False
 
@@ -112,10 +240,8 @@ class TestBuildTunneledArgs:
         """Test adding host/port when not in original args."""
         args = ["-d", "mydb"]
         result = build_tunneled_args(args, "127.0.0.1", 12345, "host", 5432, False, False)
-        assert "-h" in result
-        assert "127.0.0.1" in result
-        assert "-p" in result
-        assert "12345" in result
+        missing = {"-h", "127.0.0.1", "-p", "12345"} - set(result)
+        assert not missing, f"Missing tokens: {missing}"
 
 
 class TestFindExecutables:
@@ -132,61 +258,63 @@ class TestFindExecutables:
         result = find_pg_dumpall()
         assert result.endswith("pg_dumpall")
 
+    def test_find_pg_dumpall_skips_non_executable_and_caches(self, tmp_path, monkeypatch):
+        """Test that only executable files match and the lookup is cached."""
+        not_exec = tmp_path / "a"
+        not_exec.mkdir()
+        (not_exec / "pg_dumpall").write_text("")
+        is_exec = tmp_path / "b"
+        is_exec.mkdir()
+        (is_exec / "pg_dumpall").write_text("")
+        (is_exec / "pg_dumpall").chmod(0o755)
+        monkeypatch.setenv("PATH", os.pathsep.join([str(not_exec), str(is_exec)]))
+
+        find_pg_dumpall.cache_clear()
+        try:
+            assert find_pg_dumpall() == str(is_exec / "pg_dumpall")
+            monkeypatch.setenv("PATH", "")
+            assert find_pg_dumpall() == str(is_exec / "pg_dumpall")
+        finally:
+            find_pg_dumpall.cache_clear()
+
 
 class TestDumpCli:
     """Tests for pgcli_dump CLI."""
 
-    def test_help(self):
+    def test_help(self, dump_help):
         """Test --help option."""
-        runner = CliRunner()
-        result = runner.invoke(dump_cli, ["--help"])
-        assert result.exit_code == 0
-        assert "pg_dump wrapper with SSH tunnel support" in result.output
-        assert "--ssh-tunnel" in result.output
+        assert dump_help.exit_code == 0
+        assert "pg_dump wrapper with SSH tunnel support" in dump_help.output
+        assert "--ssh-tunnel" in dump_help.output
+        assert "--dsn" in dump_help.output
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    def test_passthrough_args(self, mock_config, mock_run):
+    def test_passthrough_args(self, runner, dump_mocks):
         """Test that pg_dump args are passed through."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-h", "localhost", "-d", "mydb", "-F", "c"])
 
-        mock_run.assert_called_once()
-        cmd = mock_run.call_args[0][0]
+        dump_mocks.run.assert_called_once()
+        cmd = dump_mocks.run.call_args[0][0]
         assert "-F" in cmd
         assert "c" in cmd
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    @patch("pgcli.dump.get_tunnel_manager_from_config")
-    def test_with_ssh_tunnel_option(self, mock_tunnel_manager, mock_config, mock_run):
+    def test_with_ssh_tunnel_option(self, runner, dump_mocks):
         """Test --ssh-tunnel option."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
         mock_manager = MagicMock()
         mock_manager.start_tunnel.return_value = ("127.0.0.1", 12345)
-        mock_tunnel_manager.return_value = mock_manager
+        dump_mocks.tunnel_manager.return_value = mock_manager
 
-        runner = CliRunner()
         result = runner.invoke(
             dump_cli,
             ["--ssh-tunnel", "user@bastion", "-h", "db.internal", "-d", "mydb"],
         )
 
-        mock_tunnel_manager.assert_called_once()
+        dump_mocks.tunnel_manager.assert_called_once()
         mock_manager.start_tunnel.assert_called_once()
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    def test_exit_code_passthrough(self, mock_config, mock_run):
+    def test_exit_code_passthrough(self, runner, dump_mocks):
         """Test that exit code is passed through from pg_dump."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=1)
+        dump_mocks.run.return_value = _FAIL
 
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-d", "nonexistent"])
 
         assert result.exit_code == 1
@@ -195,65 +323,97 @@ class TestDumpCli:
 class TestDumpallCli:
     """Tests for pgcli_dumpall CLI."""
 
-    def test_help(self):
+    def test_help(self, dumpall_help):
         """Test --help option."""
-        runner = CliRunner()
-        result = runner.invoke(dumpall_cli, ["--help"])
-        assert result.exit_code == 0
-        assert "pg_dumpall wrapper with SSH tunnel support" in result.output
-        assert "--ssh-tunnel" in result.output
+        assert dumpall_help.exit_code == 0
+        assert "pg_dumpall wrapper with SSH tunnel support" in dumpall_help.output
+        assert "--ssh-tunnel" in dumpall_help.output
+        assert "--dsn" in dumpall_help.output
 
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    def test_passthrough_args(self, mock_config, mock_run):
+    def test_passthrough_args(self, runner, dumpall_mocks):
         """Test that pg_dumpall args are passed through."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
         result = runner.invoke(dumpall_cli, ["-h", "localhost", "-g", "-f", "globals.sql"])
 
-        mock_run.assert_called_once()
-        cmd = mock_run.call_args[0][0]
+        dumpall_mocks.run.assert_called_once()
+        cmd = dumpall_mocks.run.call_args[0][0]
         assert "-g" in cmd
         assert "-f" in cmd
         assert "globals.sql" in cmd
 
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    @patch("pgcli.dumpall.get_tunnel_manager_from_config")
-    def test_with_ssh_tunnel_option(self, mock_tunnel_manager, mock_config, mock_run):
+    def test_with_ssh_tunnel_option(self, runner, dumpall_mocks):
         """Test --ssh-tunnel option."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
         mock_manager = MagicMock()
         mock_manager.start_tunnel.return_value = ("127.0.0.1", 12345)
-        mock_tunnel_manager.return_value = mock_manager
+        dumpall_mocks.tunnel_manager.return_value = mock_manager
 
-        runner = CliRunner()
         result = runner.invoke(
             dumpall_cli,
             ["--ssh-tunnel", "user@bastion", "-h", "db.internal", "-g"],
         )
 
-        mock_tunnel_manager.assert_called_once()
+        dumpall_mocks.tunnel_manager.assert_called_once()
         mock_manager.start_tunnel.assert_called_once()
 
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    def test_globals_only_option(self, mock_config, mock_run):
-        """Test -g/--globals-only option passthrough."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
+    @patch("pgcli.dumpall.os.execvp")
+    def test_execs_pg_dumpall_without_tunnel(self, mock_execvp, runner, dumpall_mocks):
+        """Test that pg_dumpall replaces the wrapper process when no tunnel is needed."""
+        mock_execvp.side_effect = SystemExit(0)
 
-        runner = CliRunner()
         result = runner.invoke(dumpall_cli, ["-h", "localhost", "-g"])
 
-        mock_run.assert_called_once()
-        cmd = mock_run.call_args[0][0]
+        assert result.exit_code == 0
+        path, cmd = mock_execvp.call_args[0]
+        assert cmd[0] == path
+        assert cmd[1:] == ["-h", "localhost", "-g"]
+        dumpall_mocks.run.assert_not_called()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="F_SETPIPE_SZ is Linux-only")
+    def test_grow_stdout_pipe(self):
+        """Test that a piped stdout gets a larger pipe buffer."""
+        import fcntl
+
+        read_fd, write_fd = os.pipe()
+        try:
+            with patch("pgcli.dumpall.sys.stdout", MagicMock(fileno=lambda: write_fd)):
+                _grow_stdout_pipe(MagicMock())
+            assert fcntl.fcntl(write_fd, getattr(fcntl, "F_GETPIPE_SZ", 1032)) >= STDOUT_PIPE_SIZE
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+    def test_globals_only_option(self, runner, dumpall_mocks):
+        """Test -g/--globals-only option passthrough."""
+        result = runner.invoke(dumpall_cli, ["-h", "localhost", "-g"])
+
+        dumpall_mocks.run.assert_called_once()
+        cmd = dumpall_mocks.run.call_args[0][0]
         assert "-g" in cmd
 
 
+class TestCliArgSplitting:
+    """Tests for how the wrappers split their own options from pg_dump's.
+
+    These only need Click's parsing, so they build a context directly
+    instead of running the command body through CliRunner.
+    """
+
+    @pytest.mark.parametrize("command", [dump_cli, dumpall_cli], ids=["pgcli_dump", "pgcli_dumpall"])
+    def test_wrapper_options_are_consumed(self, command):
+        """Test that --ssh-tunnel/--dsn/-v are parsed and the rest is left for pg_dump."""
+        argv = ["-h", "db.internal", "--ssh-tunnel", "user@bastion", "-F", "c", "--dsn", "prod", "-v", "--no-owner"]
+        with command.make_context(command.name, list(argv), resilient_parsing=True) as ctx:
+            assert ctx.params == {"ssh_tunnel": "user@bastion", "dsn_alias": "prod", "verbose": True}
+            assert ctx.args == ["-h", "db.internal", "-F", "c", "--no-owner"]
+
+    @pytest.mark.parametrize("command", [dump_cli, dumpall_cli], ids=["pgcli_dump", "pgcli_dumpall"])
+    def test_pg_dump_args_pass_through_untouched(self, command):
+        """Test that options unknown to the wrapper reach ctx.args in order."""
+        argv = ["--host=db", "-p", "5433", "--schema-only", "-f", "out.sql"]
+        with command.make_context(command.name, list(argv), resilient_parsing=True) as ctx:
+            assert ctx.params == {"ssh_tunnel": None, "dsn_alias": None, "verbose": False}
+            assert ctx.args == argv
+
+
 # =============================================================================
 # Extended tests for parse_connection_args edge cases
 # =============================================================================
@@ -359,53 +519,39 @@ class TestParseConnectionArgsEdgeCases:
 # Extended tests for build_tunneled_args
 # =============================================================================
 
-class TestBuildTunneledArgsExtended:
-    """Extended tests for build_tunneled_args function."""
-
-    def test_replace_host_long_format(self):
-        """Test replacing --host with tunnel host."""
-        args = ["--host", "original.host", "-d", "mydb"]
-        result = build_tunneled_args(args, "127.0.0.1", 12345, "original.host", 5432, True, False)
-        assert "--host" not in result or result[result.index("--host") + 1] == "127.0.0.1"
-        # Check -h was used instead
-        if "-h" in result:
-            idx = result.index("-h")
-            assert result[idx + 1] == "127.0.0.1"
-
-    def test_replace_host_equals_format(self):
-        """Test replacing --host=value format."""
-        args = ["--host=original.host", "-d", "mydb"]
-        result = build_tunneled_args(args, "127.0.0.1", 12345, "original.host", 5432, True, False)
-        assert "--host=127.0.0.1" in result
-
-    def test_replace_port_long_format(self):
-        """Test replacing --port with tunnel port."""
-        args = ["--port", "5432", "-d", "mydb"]
-        result = build_tunneled_args(args, "127.0.0.1", 12345, "host", 5432, False, True)
-        # Check that port was replaced
-        if "-p" in result:
-            idx = result.index("-p")
-            assert result[idx + 1] == "12345"
-
-    def test_replace_port_equals_format(self):
-        """Test replacing --port=value format."""
-        args = ["--port=5432", "-d", "mydb"]
-        result = build_tunneled_args(args, "127.0.0.1", 12345, "host", 5432, False, True)
-        assert "--port=12345" in result
-
-    def test_connection_string_replacement(self):
-        """Test replacing host/port in connection string."""
-        args = ["-d", "host=original.host port=5432 dbname=mydb"]
-        result = build_tunneled_args(args, "127.0.0.1", 12345, "original.host", 5432, True, True)
-        # Find the -d argument and check the connection string
-        idx = result.index("-d")
-        conn_str = result[idx + 1]
-        assert "host=127.0.0.1" in conn_str
-        assert "port=12345" in conn_str
-
-    def test_preserves_all_other_options(self):
-        """Test that all other pg_dump options are preserved."""
-        args = [
+_BUILD_TUNNELED_ARGS_CASES = (
+    pytest.param(
+        ("--host", "original.host", "-d", "mydb"),
+        "127.0.0.1", 12345, "original.host", 5432, True, False,
+        ("-h", "127.0.0.1"),
+        id="replace_host_long_format",
+    ),
+    pytest.param(
+        ("--host=original.host", "-d", "mydb"),
+        "127.0.0.1", 12345, "original.host", 5432, True, False,
+        ("--host=127.0.0.1",),
+        id="replace_host_equals_format",
+    ),
+    pytest.param(
+        ("--port", "5432", "-d", "mydb"),
+        "127.0.0.1", 12345, "host", 5432, False, True,
+        ("-p", "12345"),
+        id="replace_port_long_format",
+    ),
+    pytest.param(
+        ("--port=5432", "-d", "mydb"),
+        "127.0.0.1", 12345, "host", 5432, False, True,
+        ("--port=12345",),
+        id="replace_port_equals_format",
+    ),
+    pytest.param(
+        ("-d", "host=original.host port=5432 dbname=mydb"),
+        "127.0.0.1", 12345, "original.host", 5432, True, True,
+        ("-d", "host=127.0.0.1 port=12345 dbname=mydb"),
+        id="connection_string_replacement",
+    ),
+    pytest.param(
+        (
             "-h", "host",
             "-p", "5432",
             "-U", "user",
@@ -415,47 +561,100 @@ class TestBuildTunneledArgsExtended:
             "--schema-only",
             "-v",
             "--no-owner",
+        ),
+        "127.0.0.1", 12345, "host", 5432, True, True,
+        ("-U", "user", "-F", "c", "-f", "output.dump", "--schema-only", "-v", "--no-owner"),
+        id="preserves_all_other_options",
+    ),
+)
+
+
+class TestBuildTunneledArgsExtended:
+    """Extended tests for build_tunneled_args function."""
+
+    @pytest.mark.parametrize(
+        "args,tunnel_host,tunnel_port,orig_host,orig_port,has_host,has_port,expected",
+        _BUILD_TUNNELED_ARGS_CASES,
+    )
+    def test_build(self, args, tunnel_host, tunnel_port, orig_host, orig_port, has_host, has_port, expected):
+        """Test that the tunneled args contain every expected token."""
+        result = build_tunneled_args(list(args), tunnel_host, tunnel_port, orig_host, orig_port, has_host, has_port)
+        missing = set(expected) - set(result)
+        assert not missing, f"Missing tokens: {missing}"
+
+
+class TestDumpallConnectionArgs:
+    """Tests for the pgcli_dumpall argument scanner."""
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            [],
+            ["-h", "myhost", "-p", "5433", "-U", "user"],
+            ["--host", "myhost", "--port", "5433", "-g"],
+            ["--host=myhost", "--port=5433", "--globals-only"],
+            ["-d", "host=db.example.com port=5433 dbname=mydb"],
+            ["--dbname=host=db.example.com port=5433 user=admin"],
+            ["--dbname=mydb", "-h"],
+            ["-l", "postgres", "-p"],
+        ],
+    )
+    def test_matches_pg_dump_wrapper(self, args):
+        """Test that dumpall parses and rewrites args like the pg_dump wrapper."""
+        parsed = parse_connection_args_dumpall(args)
+        assert parsed == parse_connection_args(args)
+
+        _, _, remaining, has_host, has_port = parsed
+        expected = build_tunneled_args(remaining, "127.0.0.1", 12345, "h", 5432, has_host, has_port)
+        result = build_tunneled_args_dumpall(remaining, "127.0.0.1", 12345, "h", 5432, has_host, has_port)
+        assert result == expected
+
+    def test_scan_rewrite_reuses_single_pass(self):
+        """Test that the scanned state rewrites args without re-parsing them."""
+        args = ["-h", "db.internal", "--dbname=host=db.internal port=5433 dbname=x", "-g"]
+        state = _scan_connection_args(args)
+        assert (state.host, state.port) == ("db.internal", 5433)
+
+        with patch("pgcli.dumpall._FLAG_HANDLERS", {}):
+            result = state.rewrite("127.0.0.1", 12345)
+
+        assert result == [
+            "-h", "127.0.0.1",
+            "--dbname=host=127.0.0.1 port=12345 dbname=x",
+            "-g",
         ]
-        result = build_tunneled_args(args, "127.0.0.1", 12345, "host", 5432, True, True)
-        assert "-U" in result
-        assert "user" in result
-        assert "-F" in result
-        assert "c" in result
-        assert "-f" in result
-        assert "output.dump" in result
-        assert "--schema-only" in result
-        assert "-v" in result
-        assert "--no-owner" in result
 
 
 # =============================================================================
 # Integration tests with real pg_dump/pg_dumpall
 # =============================================================================
 
+@pytest.mark.xdist_group(name="dump_real_subproc")
 class TestIntegrationWithRealPgDump:
     """Integration tests that use real pg_dump/pg_dumpall."""
 
-    def test_pg_dump_version(self):
+    @pytest.mark.skipif(not _HAS_PG_DUMP, reason="pg_dump not installed")
+    def test_pg_dump_version(self, runner, capfd):
         """Test that pg_dump --version works through wrapper."""
-        runner = CliRunner()
-        # Use mix_stderr=False to capture stderr separately
         result = runner.invoke(dump_cli, ["--version"], catch_exceptions=False)
-        # pg_dump --version should return version info
-        # Note: exit code 0 means success, version info goes to stdout
+        # pg_dump writes straight to the inherited stdout, not Click's buffer
+        assert result.exit_code == 0
+        assert "PostgreSQL" in capfd.readouterr().out
 
-    def test_pg_dumpall_version(self):
+    @pytest.mark.skipif(not _HAS_PG_DUMPALL, reason="pg_dumpall not installed")
+    def test_pg_dumpall_version(self, runner, capfd):
         """Test that pg_dumpall --version works through wrapper."""
-        runner = CliRunner()
         result = runner.invoke(dumpall_cli, ["--version"], catch_exceptions=False)
+        assert result.exit_code == 0
+        assert "PostgreSQL" in capfd.readouterr().out
 
     @patch("pgcli.dump.subprocess.run")
     @patch("pgcli.dump.get_config")
-    def test_dump_schema_only_option(self, mock_config, mock_run):
+    def test_dump_schema_only_option(self, mock_config, mock_run, runner):
         """Test --schema-only option is passed correctly."""
         mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _OK
 
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-h", "localhost", "-d", "mydb", "--schema-only"])
 
         cmd = mock_run.call_args[0][0]
@@ -463,12 +662,11 @@ class TestIntegrationWithRealPgDump:
 
     @patch("pgcli.dump.subprocess.run")
     @patch("pgcli.dump.get_config")
-    def test_dump_format_custom(self, mock_config, mock_run):
+    def test_dump_format_custom(self, mock_config, mock_run, runner):
         """Test -F c (custom format) option."""
         mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _OK
 
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-h", "localhost", "-d", "mydb", "-F", "c"])
 
         cmd = mock_run.call_args[0][0]
@@ -478,12 +676,11 @@ class TestIntegrationWithRealPgDump:
 
     @patch("pgcli.dump.subprocess.run")
     @patch("pgcli.dump.get_config")
-    def test_dump_output_file(self, mock_config, mock_run):
+    def test_dump_output_file(self, mock_config, mock_run, runner):
         """Test -f (output file) option."""
         mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _OK
 
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-h", "localhost", "-d", "mydb", "-f", "backup.sql"])
 
         cmd = mock_run.call_args[0][0]
@@ -492,12 +689,11 @@ class TestIntegrationWithRealPgDump:
 
     @patch("pgcli.dump.subprocess.run")
     @patch("pgcli.dump.get_config")
-    def test_dump_table_option(self, mock_config, mock_run):
+    def test_dump_table_option(self, mock_config, mock_run, runner):
         """Test -t (table) option."""
         mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _OK
 
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-h", "localhost", "-d", "mydb", "-t", "users"])
 
         cmd = mock_run.call_args[0][0]
@@ -506,12 +702,11 @@ class TestIntegrationWithRealPgDump:
 
     @patch("pgcli.dump.subprocess.run")
     @patch("pgcli.dump.get_config")
-    def test_dump_schema_option(self, mock_config, mock_run):
+    def test_dump_schema_option(self, mock_config, mock_run, runner):
         """Test -n (schema) option."""
         mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_run.return_value = _OK
 
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-h", "localhost", "-d", "mydb", "-n", "public"])
 
         cmd = mock_run.call_args[0][0]
@@ -526,22 +721,13 @@ class TestIntegrationWithRealPgDump:
 class TestSSHTunnelBehavior:
     """Tests for SSH tunnel integration."""
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    @patch("pgcli.dump.get_tunnel_manager_from_config")
-    def test_tunnel_modifies_host_and_port(self, mock_tunnel_manager, mock_config, mock_run):
+    def test_tunnel_modifies_host_and_port(self, dump_mocks):
         """Test that SSH tunnel modifies host and port in command."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
         mock_manager = MagicMock()
         mock_manager.start_tunnel.return_value = ("127.0.0.1", 54321)
-        mock_tunnel_manager.return_value = mock_manager
+        dump_mocks.tunnel_manager.return_value = mock_manager
 
-        runner = CliRunner()
-        result = runner.invoke(
-            dump_cli,
-            ["--ssh-tunnel", "user@bastion", "-h", "db.internal.com", "-p", "5432", "-d", "mydb"],
-        )
+        _run_cli(dump_cli, ["--ssh-tunnel", "user@bastion", "-h", "db.internal.com", "-p", "5432", "-d", "mydb"])
 
         # Verify tunnel was started
         mock_manager.start_tunnel.assert_called_once_with(
@@ -551,92 +737,47 @@ class TestSSHTunnelBehavior:
         )
 
         # Verify command uses tunnel host/port
-        cmd = mock_run.call_args[0][0]
+        cmd = dump_mocks.run.call_args[0][0]
         assert "127.0.0.1" in cmd
         assert "54321" in cmd
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    @patch("pgcli.dump.get_tunnel_manager_from_config")
-    def test_tunnel_with_dsn_option(self, mock_tunnel_manager, mock_config, mock_run):
+    def test_tunnel_with_dsn_option(self, dump_mocks):
         """Test --dsn option for tunnel lookup."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
         mock_manager = MagicMock()
         mock_manager.start_tunnel.return_value = ("127.0.0.1", 54321)
-        mock_tunnel_manager.return_value = mock_manager
+        dump_mocks.tunnel_manager.return_value = mock_manager
 
-        runner = CliRunner()
-        result = runner.invoke(
-            dump_cli,
-            ["--dsn", "production", "-h", "db.internal.com", "-d", "mydb"],
-        )
+        _run_cli(dump_cli, ["--dsn", "production", "-h", "db.internal.com", "-d", "mydb"])
 
         # Verify tunnel was started with dsn_alias
         mock_manager.start_tunnel.assert_called_once()
         call_kwargs = mock_manager.start_tunnel.call_args[1]
         assert call_kwargs["dsn_alias"] == "production"
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    @patch("pgcli.dump.get_tunnel_manager_from_config")
-    def test_no_tunnel_preserves_original_args(self, mock_tunnel_manager, mock_config, mock_run):
+    def test_no_tunnel_preserves_original_args(self, dump_mocks):
         """Test that without tunnel, original args are preserved."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
         mock_manager = MagicMock()
         # Return same host/port = no tunnel
         mock_manager.start_tunnel.return_value = ("db.example.com", 5432)
-        mock_tunnel_manager.return_value = mock_manager
+        dump_mocks.tunnel_manager.return_value = mock_manager
 
-        runner = CliRunner()
-        result = runner.invoke(
-            dump_cli,
-            ["-h", "db.example.com", "-p", "5432", "-d", "mydb"],
-        )
+        _run_cli(dump_cli, ["-h", "db.example.com", "-p", "5432", "-d", "mydb"])
 
-        cmd = mock_run.call_args[0][0]
+        cmd = dump_mocks.run.call_args[0][0]
         assert "db.example.com" in cmd
         assert "5432" in cmd
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    @patch("pgcli.dump.get_tunnel_manager_from_config")
-    def test_tunnel_cleanup_on_success(self, mock_tunnel_manager, mock_config, mock_run):
-        """Test that tunnel is stopped after successful dump."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
+    @pytest.mark.parametrize("completed", [_OK, _FAIL], ids=["success", "error"])
+    def test_tunnel_cleanup(self, dump_mocks, completed):
+        """Test that tunnel is stopped after the dump, even when it fails."""
+        dump_mocks.run.return_value = completed
         mock_manager = MagicMock()
         mock_manager.start_tunnel.return_value = ("127.0.0.1", 54321)
-        mock_tunnel_manager.return_value = mock_manager
-
-        runner = CliRunner()
-        result = runner.invoke(
-            dump_cli,
-            ["--ssh-tunnel", "user@bastion", "-h", "db.internal", "-d", "mydb"],
-        )
+        dump_mocks.tunnel_manager.return_value = mock_manager
 
-        # Verify tunnel stop was called
-        mock_manager.stop_tunnel.assert_called_once()
-
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    @patch("pgcli.dump.get_tunnel_manager_from_config")
-    def test_tunnel_cleanup_on_error(self, mock_tunnel_manager, mock_config, mock_run):
-        """Test that tunnel is stopped even when dump fails."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=1)  # Simulate failure
-        mock_manager = MagicMock()
-        mock_manager.start_tunnel.return_value = ("127.0.0.1", 54321)
-        mock_tunnel_manager.return_value = mock_manager
-
-        runner = CliRunner()
-        result = runner.invoke(
-            dump_cli,
-            ["--ssh-tunnel", "user@bastion", "-h", "db.internal", "-d", "mydb"],
-        )
+        exit_code = _run_cli(dump_cli, ["--ssh-tunnel", "user@bastion", "-h", "db.internal", "-d", "mydb"])
 
-        # Verify tunnel stop was called even on error
+        assert exit_code == completed.returncode
         mock_manager.stop_tunnel.assert_called_once()
 
 
@@ -647,37 +788,27 @@ class TestSSHTunnelBehavior:
 class TestErrorHandling:
     """Tests for error handling scenarios."""
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    def test_pg_dump_not_found(self, mock_config, mock_run):
+    def test_pg_dump_not_found(self, runner, dump_mocks):
         """Test error when pg_dump is not found."""
-        mock_config.return_value = {}
-        mock_run.side_effect = FileNotFoundError("pg_dump not found")
+        dump_mocks.run.side_effect = FileNotFoundError("pg_dump not found")
 
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-h", "localhost", "-d", "mydb"])
 
         assert result.exit_code == 1
         assert "pg_dump not found" in result.output or "Error" in result.output
 
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    def test_pg_dumpall_not_found(self, mock_config, mock_run):
+    def test_pg_dumpall_not_found(self, runner, dumpall_mocks):
         """Test error when pg_dumpall is not found."""
-        mock_config.return_value = {}
-        mock_run.side_effect = FileNotFoundError("pg_dumpall not found")
+        dumpall_mocks.run.side_effect = FileNotFoundError("pg_dumpall not found")
 
-        runner = CliRunner()
         result = runner.invoke(dumpall_cli, ["-h", "localhost"])
 
         assert result.exit_code == 1
 
-    @patch("pgcli.dump.get_config")
-    def test_config_load_failure_continues(self, mock_config):
+    def test_config_load_failure_continues(self, runner, dump_mocks):
         """Test that config load failure doesn't crash the wrapper."""
-        mock_config.side_effect = Exception("Config error")
+        dump_mocks.config.side_effect = Exception("Config error")
 
-        runner = CliRunner()
         # Should not crash, just log warning and continue
         result = runner.invoke(dump_cli, ["--help"])
         assert result.exit_code == 0
@@ -690,26 +821,18 @@ class TestErrorHandling:
 class TestVerboseMode:
     """Tests for verbose logging mode."""
 
-    def test_setup_logging_verbose(self):
+    def test_setup_logging_verbose(self, _logging_state):
         """Test that verbose logging is configured correctly."""
-        import logging
         logger = setup_logging(verbose=True)
         assert logger.level == logging.DEBUG
 
-    def test_setup_logging_non_verbose(self):
+    def test_setup_logging_non_verbose(self, _logging_state):
         """Test that non-verbose logging is configured correctly."""
-        import logging
         logger = setup_logging(verbose=False)
         assert logger.level == logging.WARNING
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    def test_verbose_option_works(self, mock_config, mock_run):
+    def test_verbose_option_works(self, runner, dump_mocks):
         """Test -v/--verbose option."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
         result = runner.invoke(dump_cli, ["-v", "-h", "localhost", "-d", "mydb"])
 
         # Should complete successfully
@@ -723,36 +846,27 @@ class TestVerboseMode:
 class TestConfigBasedSSHTunnel:
     """Tests for SSH tunnel configuration from pgcli config."""
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    def test_tunnel_from_ssh_tunnels_config(self, mock_config, mock_run):
+    def test_tunnel_from_ssh_tunnels_config(self, runner, dump_mocks, ssh_tunnels_config):
         """Test SSH tunnel lookup from [ssh tunnels] config section."""
-        mock_config.return_value = {
-            "ssh tunnels": {
-                r".*\.prod\.example\.com": "bastion.example.com",
-            }
-        }
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
+        dump_mocks.config.return_value = ssh_tunnels_config
+
         result = runner.invoke(dump_cli, ["-h", "db.prod.example.com", "-d", "mydb"])
 
         # The tunnel should be set up based on config match
+        assert dump_mocks.tunnel_manager.call_args[0][0] is ssh_tunnels_config
+        manager = get_tunnel_manager_from_config(ssh_tunnels_config)
+        assert manager.find_tunnel_url(host="db.prod.example.com") == "bastion.example.com"
 
-    @patch("pgcli.dump.subprocess.run")
-    @patch("pgcli.dump.get_config")
-    def test_tunnel_from_dsn_ssh_tunnels_config(self, mock_config, mock_run):
+    def test_tunnel_from_dsn_ssh_tunnels_config(self, runner, dump_mocks, dsn_ssh_tunnels_config):
         """Test SSH tunnel lookup from [dsn ssh tunnels] config section."""
-        mock_config.return_value = {
-            "dsn ssh tunnels": {
-                "prod-.*": "ssh://bastion.example.com:22",
-            }
-        }
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
+        dump_mocks.config.return_value = dsn_ssh_tunnels_config
+
         result = runner.invoke(dump_cli, ["--dsn", "prod-main", "-h", "db.internal", "-d", "mydb"])
 
+        assert dump_mocks.tunnel_manager.call_args[0][0] is dsn_ssh_tunnels_config
+        manager = get_tunnel_manager_from_config(dsn_ssh_tunnels_config)
+        assert manager.find_tunnel_url(host="db.internal", dsn_alias="prod-main") == "ssh://bastion.example.com:22"
+
     def test_allow_agent_config_option(self):
         """Test allow_agent config option is passed to SSHTunnelManager."""
         from pgcli.ssh_tunnel import get_tunnel_manager_from_config
@@ -785,54 +899,14 @@ class TestConfigBasedSSHTunnel:
 class TestDumpallSpecificOptions:
     """Tests for pg_dumpall-specific options."""
 
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    def test_roles_only_option(self, mock_config, mock_run):
-        """Test -r/--roles-only option."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
-        result = runner.invoke(dumpall_cli, ["-h", "localhost", "-r"])
-
-        cmd = mock_run.call_args[0][0]
-        assert "-r" in cmd
-
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    def test_tablespaces_only_option(self, mock_config, mock_run):
-        """Test -t/--tablespaces-only option."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
-        result = runner.invoke(dumpall_cli, ["-h", "localhost", "-t"])
-
-        cmd = mock_run.call_args[0][0]
-        assert "-t" in cmd
-
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    def test_exclude_database_option(self, mock_config, mock_run):
-        """Test --exclude-database option."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
-        result = runner.invoke(dumpall_cli, ["-h", "localhost", "--exclude-database=template*"])
-
-        cmd = mock_run.call_args[0][0]
-        assert "--exclude-database=template*" in cmd
-
-    @patch("pgcli.dumpall.subprocess.run")
-    @patch("pgcli.dumpall.get_config")
-    def test_no_role_passwords_option(self, mock_config, mock_run):
-        """Test --no-role-passwords option."""
-        mock_config.return_value = {}
-        mock_run.return_value = MagicMock(returncode=0)
-
-        runner = CliRunner()
-        result = runner.invoke(dumpall_cli, ["-h", "localhost", "--no-role-passwords"])
-
-        cmd = mock_run.call_args[0][0]
-        assert "--no-role-passwords" in cmd
+    @pytest.mark.parametrize(
+        "flag",
+        ["-r", "-t", "--exclude-database=template*", "--no-role-passwords"],
+        ids=["roles_only", "tablespaces_only", "exclude_database", "no_role_passwords"],
+    )
+    def test_dumpall_passthrough_flag(self, dumpall_mocks, flag):
+        """Test pg_dumpall-specific options are passed through."""
+        _run_cli(dumpall_cli, ["-h", "localhost", flag])
+
+        cmd = dumpall_mocks.run.call_args[0][0]
+        assert flag in cmd
@@ -1,43 +1,72 @@
 # -*- coding: utf-8 -*-
 """Tests for ExtendedNamedQueries with namedqueries.d support."""
 
+import io
 import os
-import tempfile
-import shutil
 import pytest
-from configobj import ConfigObj
+from unittest.mock import patch
 
 from pgcli.namedqueries import ExtendedNamedQueries
 
 
+def _quote(value):
+    """Quote a value the way ConfigObj reads it back verbatim."""
+    if "\n" not in value:
+        if '"' not in value:
+            return f'"{value}"'
+        if "'" not in value:
+            return f"'{value}'"
+    return f'"""{value}"""' if '"""' not in value else f"'''{value}'''"
+
+
+def _ini_text(queries):
+    """Serialize queries as a [named queries] section."""
+    lines = ["[named queries]"]
+    lines.extend(f"{name} = {_quote(query)}" for name, query in queries.items())
+    return "\n".join(lines) + "\n"
+
+
 class TestExtendedNamedQueries:
     """Tests for ExtendedNamedQueries class."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.config_file = os.path.join(self.temp_dir, "config")
-        self.include_dir = os.path.join(self.temp_dir, "namedqueries.d")
+    @pytest.fixture(autouse=True)
+    def _paths(self, tmp_path):
+        """Point each test at its own tmp_path; pytest handles the cleanup."""
+        self.temp_dir = str(tmp_path)
+        self.config_file = str(tmp_path / "config")
+        self.include_dir = str(tmp_path / "namedqueries.d")
+        self._include_dir_made = False
 
-    def teardown_method(self):
-        """Clean up test fixtures."""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    def _ensure_include_dir(self):
+        """Create namedqueries.d on first use only."""
+        if not self._include_dir_made:
+            os.makedirs(self.include_dir, exist_ok=True)
+            self._include_dir_made = True
 
     def _create_config(self, queries=None):
         """Create a main config file with optional named queries."""
-        config = ConfigObj(self.config_file, encoding="utf-8")
-        if queries:
-            config["named queries"] = queries
-        config.write()
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            f.write(_ini_text(queries) if queries else "")
+        return self._read_config()
+
+    def _read_config(self):
+        """Parse the main config file, importing ConfigObj only when a test needs it."""
+        from configobj import ConfigObj
+
         return ConfigObj(self.config_file, encoding="utf-8")
 
+    @staticmethod
+    def _make_config_in_memory(queries=None):
+        """Build a config with no backing file, for tests that never touch the filesystem."""
+        from configobj import ConfigObj
+
+        return ConfigObj(io.StringIO(_ini_text(queries) if queries else ""), encoding="utf-8")
+
     def _create_include_file(self, filename, queries):
         """Create an include file with named queries."""
-        os.makedirs(self.include_dir, exist_ok=True)
-        filepath = os.path.join(self.include_dir, filename)
-        config = ConfigObj(filepath, encoding="utf-8")
-        config["named queries"] = queries
-        config.write()
+        self._ensure_include_dir()
+        with open(os.path.join(self.include_dir, filename), "w", encoding="utf-8") as f:
+            f.write(_ini_text(queries))
 
     def test_no_include_dir(self):
         """Test behavior when namedqueries.d doesn't exist."""
@@ -49,7 +78,7 @@ class TestExtendedNamedQueries:
 
     def test_empty_include_dir(self):
         """Test behavior with empty namedqueries.d directory."""
-        os.makedirs(self.include_dir)
+        self._ensure_include_dir()
         config = self._create_config({"ver": "SELECT version()"})
         nq = ExtendedNamedQueries.from_config(config)
 
@@ -164,7 +193,7 @@ class TestExtendedNamedQueries:
             "valid_query": "SELECT 1"
         })
         # Create a non-.conf file (should be ignored)
-        os.makedirs(self.include_dir, exist_ok=True)
+        self._ensure_include_dir()
         with open(os.path.join(self.include_dir, "readme.txt"), "w") as f:
             f.write("This is not a config file")
         with open(os.path.join(self.include_dir, "backup.conf.bak"), "w") as f:
@@ -181,7 +210,7 @@ class TestExtendedNamedQueries:
             "valid_query": "SELECT 1"
         })
         # Create an invalid config file
-        os.makedirs(self.include_dir, exist_ok=True)
+        self._ensure_include_dir()
         with open(os.path.join(self.include_dir, "invalid.conf"), "w") as f:
             f.write("this is not valid config syntax [[[")
 
@@ -198,9 +227,38 @@ class TestExtendedNamedQueries:
         nq.save("new_query", "SELECT 'new'")
 
         # Reload config and verify
-        config = ConfigObj(self.config_file, encoding="utf-8")
+        config = self._read_config()
         assert config["named queries"]["new_query"] == "SELECT 'new'"
 
+    def test_save_and_delete_refresh_listing(self):
+        """Test that save() and delete() are reflected in list() and get()."""
+        config = self._create_config({"old": "SELECT 1"})
+        self._create_include_file("test.conf", {"included": "SELECT 2"})
+        nq = ExtendedNamedQueries.from_config(config)
+
+        nq.save("new_query", "SELECT 'new'")
+        assert nq.list() == ["included", "new_query", "old"]
+        assert nq.get("new_query") == "SELECT 'new'"
+
+        nq.delete("old")
+        assert nq.list() == ["included", "new_query"]
+        assert nq.get("old") is None
+
+    def test_delete_reveals_shadowed_include(self):
+        """Test that deleting a main query falls back to the included one of the same name."""
+        config = self._create_config({"shared": "SELECT 'main'"})
+        self._create_include_file("test.conf", {"shared": "SELECT 'included'"})
+        nq = ExtendedNamedQueries.from_config(config)
+
+        nq.save("shared", "SELECT 'saved'")
+        assert nq.get("shared") == "SELECT 'saved'"
+        assert nq.get_source("shared") == "config"
+
+        nq.delete("shared")
+        assert nq.list() == ["shared"]
+        assert nq.get("shared") == "SELECT 'included'"
+        assert nq.get_source("shared") == "include"
+
     def test_delete_query_from_main_config(self):
         """Test that delete() removes from main config."""
         config = self._create_config({
@@ -212,7 +270,7 @@ class TestExtendedNamedQueries:
         assert "Deleted" in result
 
         # Reload config and verify
-        config = ConfigObj(self.config_file, encoding="utf-8")
+        config = self._read_config()
         assert "to_delete" not in config.get("named queries", {})
 
     def test_files_loaded_in_sorted_order(self):
@@ -240,9 +298,8 @@ class TestExtendedNamedQueries:
 
         # Create a file in the custom directory
         custom_file = os.path.join(custom_dir, "custom.conf")
-        custom_config = ConfigObj(custom_file, encoding="utf-8")
-        custom_config["named queries"] = {"custom_query": "SELECT 'custom'"}
-        custom_config.write()
+        with open(custom_file, "w", encoding="utf-8") as f:
+            f.write(_ini_text({"custom_query": "SELECT 'custom'"}))
 
         nq = ExtendedNamedQueries.from_config(config, include_dir=custom_dir)
 
@@ -250,15 +307,27 @@ class TestExtendedNamedQueries:
 
     def test_get_nonexistent_query(self):
         """Test getting a query that doesn't exist."""
-        config = self._create_config()
+        config = self._make_config_in_memory()
         nq = ExtendedNamedQueries.from_config(config)
 
         assert nq.get("nonexistent") is None
 
+    def test_in_memory_config(self):
+        """Test that a config without a filename loads, reloads and saves without an include directory."""
+        config = self._make_config_in_memory({"ver": "SELECT version()"})
+        nq = ExtendedNamedQueries.from_config(config)
+
+        nq.reload_includes()
+        assert nq.list() == ["ver"]
+
+        nq.save("q", "SELECT 1")
+        assert nq.list() == ["q", "ver"]
+        assert config["named queries"]["q"] == "SELECT 1"
+
     def test_load_without_section_header(self):
         """Test loading queries from file without [named queries] section."""
         config = self._create_config()
-        os.makedirs(self.include_dir, exist_ok=True)
+        self._ensure_include_dir()
 
         # Create file without section header - just key=value pairs
         filepath = os.path.join(self.include_dir, "simple.conf")
@@ -276,7 +345,7 @@ class TestExtendedNamedQueries:
     def test_mixed_formats_in_include_dir(self):
         """Test loading from files with and without section headers."""
         config = self._create_config()
-        os.makedirs(self.include_dir, exist_ok=True)
+        self._ensure_include_dir()
 
         # File with section
         self._create_include_file("with_section.conf", {
@@ -299,13 +368,10 @@ class TestExtendedNamedQueries:
         os.makedirs(custom_dir)
 
         # Create config with includedir directive
-        config = ConfigObj(self.config_file, encoding="utf-8")
-        config["named queries"] = {
+        config = self._create_config({
             "includedir": "./my_queries",
             "main_query": "SELECT 'main'"
-        }
-        config.write()
-        config = ConfigObj(self.config_file, encoding="utf-8")
+        })
 
         # Create a file in the custom directory
         custom_file = os.path.join(custom_dir, "custom.conf")
@@ -325,12 +391,9 @@ class TestExtendedNamedQueries:
         custom_dir = os.path.join(self.temp_dir, "absolute_queries")
         os.makedirs(custom_dir)
 
-        config = ConfigObj(self.config_file, encoding="utf-8")
-        config["named queries"] = {
+        config = self._create_config({
             "includedir": custom_dir  # absolute path
-        }
-        config.write()
-        config = ConfigObj(self.config_file, encoding="utf-8")
+        })
 
         custom_file = os.path.join(custom_dir, "test.conf")
         with open(custom_file, "w") as f:
@@ -339,3 +402,64 @@ class TestExtendedNamedQueries:
         nq = ExtendedNamedQueries.from_config(config)
 
         assert nq.get("abs_query") == "SELECT 1"
+
+    def test_many_include_files_keep_sorted_override_order(self):
+        """Test that concurrent loading still merges files in sorted order."""
+        config = self._create_config()
+        count = ExtendedNamedQueries.MAX_LOAD_WORKERS * 2
+        for n in range(count):
+            self._create_include_file(f"{n:02d}.conf", {
+                "shared": f"SELECT {n}",
+                f"q{n}": f"SELECT {n}"
+            })
+
+        nq = ExtendedNamedQueries.from_config(config)
+
+        assert len(nq.list()) == count + 1
+        assert nq.get("shared") == f"SELECT {count - 1}"
+
+    def test_unchanged_include_dir_is_not_reparsed(self):
+        """Test that an unchanged namedqueries.d reuses the previous parse."""
+        config = self._create_config()
+        self._create_include_file("test.conf", {"q1": "SELECT 1"})
+        ExtendedNamedQueries.from_config(config)
+
+        with patch.object(ExtendedNamedQueries, "_parse_file") as mock_parse:
+            nq = ExtendedNamedQueries.from_config(config)
+        mock_parse.assert_not_called()
+        assert nq.get("q1") == "SELECT 1"
+
+        # Changing a file invalidates the cached parse
+        self._create_include_file("test.conf", {"q1": "SELECT 1", "q2": "SELECT 22"})
+        nq.reload_includes()
+        assert nq.get("q2") == "SELECT 22"
+
+    def test_only_changed_include_files_are_reparsed(self):
+        """Test that a reload re-parses just the include files that changed."""
+        config = self._create_config()
+        self._create_include_file("a.conf", {"qa": "SELECT 1"})
+        self._create_include_file("b.conf", {"qb": "SELECT 2"})
+        nq = ExtendedNamedQueries.from_config(config)
+
+        self._create_include_file("b.conf", {"qb": "SELECT 22"})
+        with patch.object(ExtendedNamedQueries, "_parse_file", autospec=True,
+                          side_effect=ExtendedNamedQueries._parse_file) as mock_parse:
+            nq.reload_includes()
+
+        assert [call.args[1] for call in mock_parse.call_args_list] == [os.path.join(self.include_dir, "b.conf")]
+        assert nq.get("qa") == "SELECT 1"
+        assert nq.get("qb") == "SELECT 22"
+
+    def test_configobj_syntax_in_include_files(self):
+        """Test that include files are read with ConfigObj's comment and multi-line value rules."""
+        config = self._create_config()
+        self._ensure_include_dir()
+        with open(os.path.join(self.include_dir, "plain.conf"), "w") as f:
+            f.write("[named queries]\nbare = SELECT 1 # trailing comment\n")
+        with open(os.path.join(self.include_dir, "multiline.conf"), "w") as f:
+            f.write('[named queries]\nlong = """SELECT 1\nUNION ALL SELECT 2"""\n')
+
+        nq = ExtendedNamedQueries.from_config(config)
+
+        assert nq.get("bare") == "SELECT 1"
+        assert nq.get("long") == "SELECT 1\nUNION ALL SELECT 2"
@@ -32,11 +32,20 @@ except Exception:
     SERVER_VERSION = 0
 
 
-dbtest = pytest.mark.skipif(
+_requires_db = pytest.mark.skipif(
     not CAN_CONNECT_TO_DB,
     reason="Need a postgres instance at localhost accessible by user 'postgres'",
 )
 
+# All database tests share the one _test_db database, so under pytest-xdist
+# (--dist=loadgroup) they are kept together on a single worker.
+_db_group = pytest.mark.xdist_group(name="db")
+
+
+def dbtest(func):
+    """Mark a test as needing the test database."""
+    return _db_group(_requires_db(func))
+
 
 requires_json = pytest.mark.skipif(not JSON_AVAILABLE, reason="Postgres server unavailable or json type not defined")
 